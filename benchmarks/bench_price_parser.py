@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for price_parser against the original per-pattern regex loop
+and a plain left-to-right PRICE_PATTERN scan.
+
+Run from the repository root:
+    python benchmarks/bench_price_parser.py [--rounds N]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_parser import (
+    PRICE_PATTERN, PRICE_RANGES, PriceMatch, parse_many, parse_prices, select_price, format_price
+)
+
+
+# Result card texts as they appear on Google Flights, with the price each should yield
+FIXTURES = [
+    ("SAS\n06:45 – 11:10\n3 hr 25 min\nNonstop\nCPH–AYT\n€1,951\nround trip", "€1,951"),
+    ("Pegasus\n14:20 – 18:55\n3 hr 35 min\nNonstop\n412 EUR\nround trip", "€412"),
+    ("Sunclass Airlines\n09:00 – 13:30\nNonstop\nEUR 389\nround trip", "€389"),
+    ("Corendon\n22:10 – 02:40+1\nNonstop\n$640\nround trip", "USD 640"),
+    ("Turkish Airlines\n07:00 – 11:30\nNonstop\n£520\nround trip", "GBP 520"),
+    ("SAS\n06:45 – 11:10\nNonstop\nDKK 3,450\nround trip", "DKK 3,450"),
+    ("Norwegian\n10:15 – 14:45\nNonstop\n4,120 kr\nround trip", "kr 4,120"),
+    ("Ariana\n05:30 – 16:00\nNonstop\nAFN 95,000\nround trip", "AFN 95,000"),
+    ("Pegasus\n10:05 – 14:30+1\n4 hr 25 min\nNonstop\n€234\nround trip", "€234"),
+    ("Departs 09:30\n€234", "€234"),
+    ("5 €1,234", "€1,234"),
+    ("Price graph\nTrack prices\nFrom €45 on some dates", None),
+    ("Best departing flights\nRanked based on price and convenience", None),
+]
+
+
+def legacy_parse(text):
+    """The per-element parsing that extract_flight_prices used before price_parser."""
+    eur_price_patterns = [
+        r"€\s*([0-9,]+)",
+        r"EUR\s*([0-9,]+)",
+        r"([0-9,]+)\s*€",
+        r"([0-9,]+)\s*EUR"
+    ]
+
+    for pattern in eur_price_patterns:
+        eur_price_match = re.search(pattern, text)
+        if eur_price_match:
+            price_value = int(eur_price_match.group(1).replace(",", ""))
+            if 100 <= price_value <= 10000:
+                return f"€{eur_price_match.group(1)}"
+
+    if not any(re.search(pattern, text) for pattern in eur_price_patterns):
+        fallback_patterns = [
+            (r"\$\s*([0-9,]+)", "USD", 50, 5000),
+            (r"£\s*([0-9,]+)", "GBP", 50, 4000),
+            (r"(DKK)\s*([0-9,]+)", "DKK", 400, 35000),
+            (r"(AFN)\s*([0-9,]+)", "AFN", 5000, 500000),
+            (r"([0-9,]+)\s*kr", "kr", 500, 50000)
+        ]
+
+        for pattern, currency_code, min_val, max_val in fallback_patterns:
+            price_match = re.search(pattern, text, re.IGNORECASE)
+            if price_match:
+                price_value_str = price_match.group(1) if len(price_match.groups()) == 1 else price_match.group(2)
+                try:
+                    price_value = int(price_value_str.replace(",", ""))
+                    if min_val <= price_value <= max_val:
+                        return f"{currency_code} {price_value_str}"
+                except ValueError:
+                    continue
+    return None
+
+
+def pattern_parse(text):
+    """Scan with PRICE_PATTERN alone, resuming just after out-of-range matches."""
+    prices = []
+    match = PRICE_PATTERN.search(text)
+    while match:
+        group = match.lastgroup
+        currency = 'EUR' if group.startswith('EUR') else group
+        amount = int(match.group(group).replace(",", ""))
+        min_val, max_val = PRICE_RANGES[currency]
+        if min_val <= amount <= max_val:
+            prices.append(PriceMatch(amount, currency, match.span()))
+            match = PRICE_PATTERN.search(text, match.end())
+        else:
+            match = PRICE_PATTERN.search(text, match.start() + 1)
+    return prices
+
+
+def check_fixtures():
+    """Verify the parser returns the expected price for every fixture, as PRICE_PATTERN would."""
+    failures = 0
+    for text, expected in FIXTURES:
+        price = select_price(parse_prices(text))
+        got = format_price(price) if price else None
+        if got != expected:
+            failures += 1
+            print(f"MISMATCH: expected {expected!r}, got {got!r} for {text!r}")
+        elif parse_prices(text) != pattern_parse(text):
+            failures += 1
+            print(f"MISMATCH with the PRICE_PATTERN scan for {text!r}")
+    print(f"Fixtures: {len(FIXTURES) - failures}/{len(FIXTURES)} correct")
+    return failures == 0
+
+
+def timed(label, func, rounds):
+    """Run func rounds times and print the mean time per round."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<32} {elapsed * 1e6:10.1f} us/round")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark price parsing.")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    if not check_fixtures():
+        sys.exit(1)
+
+    texts = [text for text, _ in FIXTURES]
+    legacy = timed("legacy per-pattern loop", lambda: [legacy_parse(t) for t in texts], args.rounds)
+    pattern = timed("PRICE_PATTERN scan per text", lambda: [select_price(pattern_parse(t)) for t in texts],
+                    args.rounds)
+    single = timed("parse_prices per text", lambda: [select_price(parse_prices(t)) for t in texts], args.rounds)
+    bulk = timed("parse_many (one scan)", lambda: [select_price(p) for p in parse_many(texts)], args.rounds)
+
+    print(f"Speedup vs legacy: {legacy / single:.1f}x per text, {legacy / bulk:.1f}x bulk "
+          f"(PRICE_PATTERN scan: {legacy / pattern:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
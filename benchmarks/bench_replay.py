@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""End-to-end replay benchmark for the scraper's page stages.
+
+Record snapshots once during a live run:
+    python copenhagen_antalya_scraper.py --save-snapshots fixtures/
+Then replay them in headless Chrome with no network access:
+    python benchmarks/bench_replay.py fixtures/ [--rounds N] [--json out.json] [--baseline old.json]
+
+Each stage runs against the page it started from in the live run: the
+consent handler on the landing page, the nonstop filter on the rendered
+results, the currency dialog on the filtered page, and extraction on the
+final page (extraction does not change it). Replayed pages have no
+scripts and cannot react to clicks, so readiness waits for post-click
+state are capped by --wait-timeout and reported separately.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import readiness
+from readiness import wait_for, document_ready, reset_wait_timings
+from copenhagen_antalya_scraper import (
+    setup_driver, handle_consent_page, apply_nonstop_filter, select_eur_currency, extract_flight_prices
+)
+from driver_pool import teardown_driver
+from replay import ReplayServer, load_manifest
+
+
+# (stage name, snapshot of the page the stage starts from, function under test)
+STAGES = [
+    ('consent', 'landing', handle_consent_page),
+    ('nonstop_filter', 'results', apply_nonstop_filter),
+    ('currency', 'nonstop_filter', select_eur_currency),
+    ('extract', 'final', extract_flight_prices),
+]
+
+# Keep Chrome off the network; only the replay server on loopback resolves
+OFFLINE_ARGUMENTS = ["--host-resolver-rules=MAP * ~NOTFOUND , EXCLUDE 127.0.0.1"]
+
+
+def find_snapshot_dirs(root):
+    """Return the snapshot directories (one per search and country) under root."""
+    return sorted(
+        name for name in os.listdir(root)
+        if load_manifest(os.path.join(root, name))
+    )
+
+
+def replay_country(driver, server, name, manifest):
+    """Run every stage once against one country's snapshots and return the timings."""
+    timings = {}
+    for stage, snapshot, func in STAGES:
+        if snapshot not in manifest:
+            continue
+
+        start = time.perf_counter()
+        driver.get(server.url_for(os.path.join(name, manifest[snapshot]['html'])))
+        wait_for(driver, 'page_load', document_ready)
+        loaded = time.perf_counter()
+
+        reset_wait_timings(driver)
+        func(driver)
+        finished = time.perf_counter()
+
+        waits = sum(elapsed for _, elapsed, _ in getattr(driver, 'wait_timings', []))
+        timings[stage] = {
+            'load': loaded - start,
+            'run': finished - loaded,
+            'wait': waits,
+        }
+
+    timings['total'] = sum(t['load'] + t['run'] for t in timings.values())
+    return timings
+
+
+def average(runs):
+    """Average a list of per-round timing dicts."""
+    result = {}
+    for key in runs[0]:
+        if key == 'total':
+            result[key] = sum(run[key] for run in runs) / len(runs)
+        else:
+            result[key] = {part: sum(run[key][part] for run in runs) / len(runs) for part in runs[0][key]}
+    return result
+
+
+def print_report(results):
+    """Print per-stage latency and total seconds per country."""
+    stages = [stage for stage, _, _ in STAGES]
+    print(f"\n{'Country snapshot':<48}" + "".join(f"{stage:>16}" for stage in stages) + f"{'total s':>10}")
+    for name, timings in results.items():
+        cells = ""
+        for stage in stages:
+            if stage in timings:
+                t = timings[stage]
+                cells += f"{(t['load'] + t['run']) * 1000:>9.0f}ms"
+                cells += f"{'(' + format(t['wait'] * 1000, '.0f') + ')':>7}"
+            else:
+                cells += f"{'-':>16}"
+        print(f"{name:<48}{cells}{timings['total']:>10.2f}")
+    print("(milliseconds per stage including page load; readiness wait time in parentheses)")
+
+
+def compare_to_baseline(results, baseline_file, tolerance):
+    """Report countries whose total time regressed beyond tolerance; return True if any did."""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    regressed = False
+    for name, timings in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['total'], timings['total']
+        if after > before * (1 + tolerance):
+            regressed = True
+            print(f"REGRESSION {name}: {before:.2f}s -> {after:.2f}s")
+    if not regressed:
+        print(f"No regressions beyond {tolerance:.0%} against {baseline_file}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay saved Google Flights snapshots and time each stage.")
+    parser.add_argument("snapshot_root", help="Directory passed to --save-snapshots during a live run")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--wait-timeout", type=float, default=1.0,
+                        help="Cap for every readiness wait while replaying (default: 1.0s)")
+    parser.add_argument("--offline", action="store_true", help="Never call webdriver_manager")
+    parser.add_argument("--json", help="Write averaged timings to this file")
+    parser.add_argument("--baseline", help="Earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against --baseline before reporting a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    for step in readiness.STEP_TIMEOUTS:
+        readiness.STEP_TIMEOUTS[step] = min(readiness.STEP_TIMEOUTS[step], args.wait_timeout)
+
+    names = find_snapshot_dirs(args.snapshot_root)
+    if not names:
+        print(f"No snapshots found under {args.snapshot_root}")
+        sys.exit(1)
+
+    results = {}
+    driver = setup_driver(offline=args.offline, extra_arguments=OFFLINE_ARGUMENTS)
+    try:
+        with ReplayServer(args.snapshot_root) as server:
+            for name in names:
+                manifest = load_manifest(os.path.join(args.snapshot_root, name))
+                runs = [replay_country(driver, server, name, manifest) for _ in range(args.rounds)]
+                results[name] = average(runs)
+    finally:
+        teardown_driver(driver)
+
+    print_report(results)
+    print(f"\nMean seconds per country: {sum(t['total'] for t in results.values()) / len(results):.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Timings written to {args.json}")
+
+    if args.baseline and compare_to_baseline(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Small JSON state files kept under .cache between runs."""
+import os
+import json
+
+
+CACHE_DIR = ".cache"
+
+
+def cache_path(name):
+    """Return the path of a cache file under CACHE_DIR."""
+    return os.path.join(CACHE_DIR, name)
+
+
+def load_json(path, default=None):
+    """Load a JSON cache file, or return default if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {} if default is None else default
+
+
+def save_json(path, data):
+    """Write a JSON cache file atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_file, path)
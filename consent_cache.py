@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Reuse Google's consent cookies so fresh sessions skip the consent interstitial."""
+import time
+import threading
+from urllib.parse import urlparse, parse_qs
+
+from cache_files import cache_path, load_json, save_json
+
+
+CACHE_FILE = cache_path("consent_cookies.json")
+
+# Cookies Google sets once consent has been given
+CONSENT_COOKIE_NAMES = ('SOCS', 'CONSENT')
+CONSENT_COOKIE_URLS = ["https://www.google.com", "https://consent.google.com"]
+
+# Fields Network.setCookies accepts from what Network.getCookies returns
+COOKIE_PARAM_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+# True while the consent interstitial or its form is on screen
+CONSENT_SHOWN_JS = """
+return location.hostname.indexOf('consent.') === 0
+    || document.querySelector("form[action*='consent'], #consent-bump") !== null;
+"""
+
+
+def cache_key(url):
+    """Key cookies by Google domain and interface language, e.g. "google.com/en"."""
+    parsed = urlparse(url)
+    domain = parsed.netloc[4:] if parsed.netloc.startswith("www.") else parsed.netloc
+    locale = parse_qs(parsed.query).get('hl', ['default'])[0]
+    return f"{domain}/{locale}"
+
+
+class ConsentCache:
+    """Pre-accepted consent cookies per domain/locale, with hit and miss counts.
+
+    A hit is a page that loaded without the consent interstitial after
+    cookies were injected. A miss is a page that still showed it, so the
+    click-through handler had to run; its cookies are then learned.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.cookies = load_json(path)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def inject(self, driver, url):
+        """Set cached consent cookies for url's domain/locale before navigating; True if any were set."""
+        now = time.time()
+        with self.lock:
+            cookies = [cookie for cookie in self.cookies.get(cache_key(url), [])
+                       if cookie.get('expires', -1) <= 0 or cookie['expires'] > now]
+        if not cookies:
+            return False
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        return True
+
+    def learn(self, driver, url):
+        """Store the consent cookies the browser holds now, after consent was given."""
+        response = driver.execute_cdp_cmd("Network.getCookies", {"urls": CONSENT_COOKIE_URLS})
+        cookies = [{field: cookie[field] for field in COOKIE_PARAM_FIELDS if field in cookie}
+                   for cookie in response.get('cookies', []) if cookie['name'] in CONSENT_COOKIE_NAMES]
+        if cookies:
+            with self.lock:
+                self.cookies[cache_key(url)] = cookies
+            print(f"Cached {len(cookies)} consent cookies for {cache_key(url)}")
+
+    def forget(self, url):
+        with self.lock:
+            self.cookies.pop(cache_key(url), None)
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def report(self):
+        """Print this run's hit rate."""
+        total = self.hits + self.misses
+        if total:
+            print(f"Consent cache: {self.hits} hits, {self.misses} misses ({self.hits / total:.0%} hit rate)")
+
+    def save(self):
+        with self.lock:
+            save_json(self.path, self.cookies)
+
+
+def consent_shown(driver):
+    """True if the consent interstitial is on the page right now (no waiting)."""
+    return driver.execute_script(CONSENT_SHOWN_JS)
@@ -1,85 +1,69 @@
 #!/usr/bin/env python3
 import os
+import json
+import argparse
 import time
-import re
 import random
 import shutil
 import uuid
-import pandas as pd
-import subprocess
-import boto3
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.action_chains import ActionChains
 import tempfile
 from selenium.webdriver.common.keys import Keys
-import subprocess
 from datetime import datetime
-
-
-def upload_all_to_s3(bucket='flightscreenshots'):
-    """Upload all screenshots and CSV files to S3"""
-    s3 = boto3.client('s3')
-    for file in os.listdir('screenshots'):
-        s3.upload_file(f"screenshots/{file}", bucket, f"screenshots/{file}")
-        print(f"Uploaded screenshots/{file}")
-
-
-def connect_to_vpn(country):
-    """Connect to NordVPN server in specified country."""
-    try:
-        print(f"Connecting to NordVPN server in {country}...")
-
-        # Disconnect any existing connection
-        subprocess.run(["nordvpn", "disconnect"], capture_output=True, text=True)
-        time.sleep(2)
-
-        # Connect to specified country
-        result = subprocess.run(["nordvpn", "connect", country], capture_output=True, text=True)
-
-        if result.returncode == 0:
-            print(f"Successfully connected to {country}")
-            time.sleep(5)  # Wait for connection to stabilize
-            return True
-        else:
-            print(f"Failed to connect to {country}: {result.stderr}")
-            return False
-
-    except Exception as e:
-        print(f"Error connecting to VPN: {e}")
-        return False
-
-
-def disconnect_vpn():
-    """Disconnect from NordVPN."""
-    try:
-        print("Disconnecting from VPN...")
-        subprocess.run(["nordvpn", "disconnect"], capture_output=True, text=True)
-        time.sleep(2)
-        print("Disconnected from VPN")
-    except Exception as e:
-        print(f"Error disconnecting from VPN: {e}")
-
-
-def get_current_ip():
-    """Get current IP address to verify VPN connection."""
-    try:
-        result = subprocess.run(["curl", "-s", "https://ipinfo.io/ip"], capture_output=True, text=True)
-        if result.returncode == 0:
-            return result.stdout.strip()
-        return "Unknown"
-    except:
-        return "Unknown"
-
-
-def setup_driver():
-    """Set up and return a configured Chrome WebDriver with clean session."""
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+from readiness import (
+    wait_for, reset_wait_timings, print_wait_report, document_ready, results_rendered,
+    nonstop_filter_active, dialog_closed, currency_symbol_present, any_element_visible,
+    network_idle
+)
+from driver_pool import DriverPool, teardown_driver
+from driver_cache import resolve_chromedriver_path
+from replay import snapshot_dir_for, save_snapshot
+from s3_upload import upload_directories, UploadQueue, DEFAULT_BUCKET, UPLOAD_DIRECTORIES
+from screenshots import ScreenshotWriter, SCREENSHOT_FORMATS, RESULTS_SELECTOR
+from search_matrix import (
+    DEFAULT_CONFIG, Job, load_config, expand_searches, search_priorities, config_countries, expand_jobs,
+    group_jobs_by_country
+)
+from scheduler import plan_batches, print_plan, SwitchStats, DEFAULT_STALE_AFTER_HOURS
+from price_store import PriceStore, DEFAULT_DB
+from records import ScrapeResult, from_price, no_price, format_amount, write_csv
+from vpn_health import VpnHealth
+from egress import EgressVerifier, DEFAULT_ECHO_URL
+from vpn_controller import VpnController
+from country_catalogue import CountryCatalogue, DEFAULT_TTL_HOURS
+from run_journal import RunJournal, JOURNAL_DIR
+from selector_stats import SelectorStats, find_first, ordered_selectors, record_selector
+from consent_cache import ConsentCache, consent_shown
+from deeplink import build_deeplink
+from resource_filter import set_resource_blocking, ResourceStats
+from payload_extractor import extract_payload_prices, payload_ready
+from flight_details import parse_flight_details, is_complete
+from price_parser import parse_prices, parse_many, select_price, format_price, FALLBACK_CURRENCIES
+
+
+def upload_all_to_s3(bucket=DEFAULT_BUCKET):
+    """Upload all screenshots and CSV files to S3, skipping unchanged objects (see --upload-backfill)"""
+    return upload_directories(bucket, UPLOAD_DIRECTORIES)
+
+
+def setup_driver(proxy=None, offline=False, extra_arguments=()):
+    """Set up and return a configured Chrome WebDriver with clean session.
+
+    If proxy is given (e.g. socks5://127.0.0.1:1080), all browser traffic
+    egresses through it instead of the host's default route. With offline
+    set, chromedriver is never looked up through webdriver_manager.
+    extra_arguments are appended to the Chrome command line.
+    """
     chrome_options = Options()
 
     # Essential options for headless operation
@@ -93,6 +77,13 @@ def setup_driver():
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
     chrome_options.add_argument("--window-size=1920,1080")
 
+    for argument in extra_arguments:
+        chrome_options.add_argument(argument)
+
+    # Per-worker egress for parallel scraping
+    if proxy:
+        chrome_options.add_argument(f"--proxy-server={proxy}")
+
     # Create unique temporary directory in current working directory
     unique_id = str(uuid.uuid4())[:8]
     timestamp = str(int(time.time()))
@@ -150,8 +141,11 @@ def setup_driver():
     }
     chrome_options.add_experimental_option("prefs", prefs)
 
+    # Expose CDP network events through the performance log for readiness waits
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
     # Create WebDriver
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver_path(offline=offline))
     driver = webdriver.Chrome(service=service, options=chrome_options)
 
     # Remove webdriver property and other automation indicators
@@ -167,14 +161,20 @@ def setup_driver():
     return driver
 
 
+# Last-resort consent approach: any button at all
+CONSENT_CATCH_ALL = "//button"
+
+
 def handle_consent_page(driver):
     """Handle Google's consent page if it appears."""
-    try:
-        # Wait for consent dialog
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, "//div[contains(@role, 'dialog')] | //form[contains(@action, 'consent')] | //div[@id='consent-bump'] | //div[contains(@class, 'consent')]"))
-        )
+    # Wait briefly for a consent dialog; the page has already loaded by now
+    consent_dialog = wait_for(driver, 'consent_dialog', EC.presence_of_element_located(
+        (By.XPATH, "//div[contains(@role, 'dialog')] | //form[contains(@action, 'consent')] | //div[@id='consent-bump'] | //div[contains(@class, 'consent')]")
+    ))
+    if not consent_dialog:
+        return True
 
+    try:
         # Try multiple approaches to find consent buttons
         consent_approaches = [
             "//button[contains(text(), 'Accept all') or contains(text(), 'I agree') or contains(text(), 'Agree') or contains(text(), 'Accept')]|//div[contains(text(), 'Accept all') and @role='button']|//span[contains(text(), 'Accept all') and @role='button']",
@@ -182,28 +182,33 @@ def handle_consent_page(driver):
             "//button[contains(@class, 'primary')]|//button[contains(@class, 'accept')]|//button[contains(@class, 'agree')]",
             "//div[@role='dialog']//button[1]|//div[contains(@class, 'dialog')]//button[1]",
             "//div[@role='button' and (contains(., 'Accept') or contains(., 'Agree'))]|//span[@role='button' and (contains(., 'Accept') or contains(., 'Agree'))]",
-            "//button"
         ]
 
-        for xpath in consent_approaches:
+        # Approaches that worked before for this locale and country are tried first. The
+        # catch-all clicks whichever button is visible (possibly "Reject all"), so it is
+        # never learned and always tried last
+        consent_approaches = ordered_selectors(driver, 'consent_button', consent_approaches) + [CONSENT_CATCH_ALL]
+        for attempt, xpath in enumerate(consent_approaches):
             try:
                 buttons = driver.find_elements(By.XPATH, xpath)
                 for button in buttons:
                     if button.is_displayed():
                         print(f"Found potential consent button: {button.text or 'unnamed button'}")
                         driver.execute_script("arguments[0].click();", button)
-                        time.sleep(2)
 
                         # Check if dialog disappeared
                         try:
-                            dialogs = driver.find_elements(By.XPATH, "//div[@role='dialog']")
-                            if not dialogs or not any(d.is_displayed() for d in dialogs):
+                            if wait_for(driver, 'consent_dismissed', dialog_closed):
                                 print("Successfully handled consent page!")
+                                if xpath != CONSENT_CATCH_ALL:
+                                    record_selector(driver, 'consent_button', xpath, True, first_try=attempt == 0)
                                 return True
                         except:
                             pass
             except Exception:
-                continue
+                pass
+            if xpath != CONSENT_CATCH_ALL:
+                record_selector(driver, 'consent_button', xpath, False)
 
         # Try iframe handling
         iframes = driver.find_elements(By.TAG_NAME, "iframe")
@@ -216,8 +221,8 @@ def handle_consent_page(driver):
                         for button in buttons:
                             if button.is_displayed():
                                 driver.execute_script("arguments[0].click();", button)
-                                time.sleep(2)
                                 driver.switch_to.default_content()
+                                wait_for(driver, 'consent_dismissed', dialog_closed)
                                 return True
                     driver.switch_to.default_content()
                 except:
@@ -227,10 +232,29 @@ def handle_consent_page(driver):
         print("Warning: Could not automatically handle consent page")
         return False
 
-    except TimeoutException:
+    except Exception as e:
+        print(f"Error handling consent page: {e}")
+        return False
+
+
+def pass_consent_page(driver, url, consent_cache=None, injected=False):
+    """Get past Google's consent page, skipping the handler when injected consent cookies worked."""
+    if consent_cache is None:
+        return handle_consent_page(driver)
+
+    shown = consent_shown(driver)
+    consent_cache.record(hit=injected and not shown)
+    if injected and not shown:
+        print("Consent cookies accepted, skipping consent page")
         return True
+    if injected:
+        # Google no longer accepts these cookies
+        consent_cache.forget(url)
 
-    return False
+    handled = handle_consent_page(driver)
+    if handled:
+        consent_cache.learn(driver, url)
+    return handled
 
 
 def apply_nonstop_filter(driver):
@@ -245,16 +269,10 @@ def apply_nonstop_filter(driver):
             "//div[contains(text(), 'Stops')]/ancestor::div[@role='button'][1]"
         ]
 
-        stops_filter = None
-        for xpath in stops_selectors:
-            try:
-                elements = driver.find_elements(By.XPATH, xpath)
-                if elements:
-                    stops_filter = elements[0]
-                    print(f"Found stops filter with selector: {xpath}")
-                    break
-            except:
-                continue
+        xpath, elements = find_first(driver, 'stops_button', stops_selectors)
+        stops_filter = elements[0] if elements else None
+        if stops_filter:
+            print(f"Found stops filter with selector: {xpath}")
 
         if not stops_filter:
             print("Could not find stops filter button")
@@ -262,7 +280,6 @@ def apply_nonstop_filter(driver):
 
         # Click stops filter
         driver.execute_script("arguments[0].click();", stops_filter)
-        time.sleep(3)
 
         # Find and click nonstop option
         nonstop_selectors = [
@@ -273,31 +290,33 @@ def apply_nonstop_filter(driver):
             "//label[contains(text(), 'Non-stop only')]",
             "//label[contains(text(), 'Nonstop only')]"
         ]
-
-        for selector in nonstop_selectors:
-            elements = driver.find_elements(By.XPATH, selector)
-            if elements:
-                print(f"Found non-stop element with selector: {selector}")
-                actions = ActionChains(driver)
-                actions.move_to_element(elements[0]).click().perform()
-                print("Clicked non-stop option")
-                time.sleep(2)
-
-                # Apply the filter
-                done_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'Done') or contains(@aria-label, 'Done')]")
-                if done_buttons:
+        wait_for(driver, 'stops_menu_open', any_element_visible(By.XPATH, nonstop_selectors))
+
+        selector, elements = find_first(driver, 'nonstop_option', nonstop_selectors)
+        if elements:
+            print(f"Found non-stop element with selector: {selector}")
+            actions = ActionChains(driver)
+            actions.move_to_element(elements[0]).click().perform()
+            print("Clicked non-stop option")
+
+            # Apply the filter
+            done_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'Done') or contains(@aria-label, 'Done')]")
+            if done_buttons:
+                try:
+                    WebDriverWait(driver, 5).until(EC.element_to_be_clickable(done_buttons[0]))
+                    actions.move_to_element(done_buttons[0]).click().perform()
+                    print("Applied non-stop filter")
+                except:
                     try:
-                        WebDriverWait(driver, 5).until(EC.element_to_be_clickable(done_buttons[0]))
-                        actions.move_to_element(done_buttons[0]).click().perform()
-                        print("Applied non-stop filter")
+                        driver.execute_script("arguments[0].click();", done_buttons[0])
+                        print("Applied non-stop filter (JavaScript)")
                     except:
-                        try:
-                            driver.execute_script("arguments[0].click();", done_buttons[0])
-                            print("Applied non-stop filter (JavaScript)")
-                        except:
-                            print("Could not click Done button")
-                    time.sleep(3)
-                return True
+                        print("Could not click Done button")
+
+            # Wait for the chip to report the filter and the list to refresh
+            wait_for(driver, 'nonstop_filter_active', nonstop_filter_active)
+            wait_for(driver, 'results_rendered', results_rendered)
+            return True
 
         print("Could not find nonstop option")
         return False
@@ -311,11 +330,9 @@ def select_eur_currency(driver):
     """Select EUR currency on Google Flights."""
     try:
         print("Attempting to select EUR currency...")
-        time.sleep(5)
 
         # Check if EUR is already selected
-        page_text = driver.find_element(By.TAG_NAME, "body").text
-        if "€" in page_text:
+        if currency_symbol_present("€")(driver):
             print("EUR currency appears to already be selected")
             return True
 
@@ -326,15 +343,8 @@ def select_eur_currency(driver):
             "//button[contains(text(), 'Currency')]"
         ]
 
-        currency_button = None
-        for selector in currency_selectors:
-            try:
-                elements = driver.find_elements(By.XPATH, selector)
-                if elements and elements[0].is_displayed():
-                    currency_button = elements[0]
-                    break
-            except:
-                continue
+        _, elements = find_first(driver, 'currency_button', currency_selectors, visible=True)
+        currency_button = elements[0] if elements else None
 
         if not currency_button:
             print("Could not find currency selector button")
@@ -342,7 +352,6 @@ def select_eur_currency(driver):
 
         # Click currency button
         driver.execute_script("arguments[0].click();", currency_button)
-        time.sleep(3)
 
         # Find and select EUR option
         eur_selectors = [
@@ -350,16 +359,11 @@ def select_eur_currency(driver):
             "//span[contains(text(), 'EUR')]",
             "//li[contains(text(), 'EUR')]"
         ]
+        wait_for(driver, 'currency_dialog_open', any_element_visible(By.XPATH, eur_selectors))
 
-        for selector in eur_selectors:
-            try:
-                elements = driver.find_elements(By.XPATH, selector)
-                if elements and elements[0].is_displayed():
-                    driver.execute_script("arguments[0].click();", elements[0])
-                    time.sleep(3)
-                    break
-            except:
-                continue
+        _, elements = find_first(driver, 'eur_option', eur_selectors, visible=True)
+        if elements:
+            driver.execute_script("arguments[0].click();", elements[0])
 
         # Click confirmation button if present
         confirmation_selectors = [
@@ -367,17 +371,13 @@ def select_eur_currency(driver):
             "//button[contains(text(), 'Done')]"
         ]
 
-        for selector in confirmation_selectors:
-            try:
-                elements = driver.find_elements(By.XPATH, selector)
-                if elements and elements[0].is_displayed():
-                    driver.execute_script("arguments[0].click();", elements[0])
-                    time.sleep(3)
-                    break
-            except:
-                continue
+        _, elements = find_first(driver, 'currency_confirm', confirmation_selectors, visible=True)
+        if elements:
+            driver.execute_script("arguments[0].click();", elements[0])
 
-        time.sleep(5)
+        # Wait for prices to be re-rendered in EUR
+        wait_for(driver, 'currency_symbol', currency_symbol_present("€"))
+        wait_for(driver, 'results_rendered', results_rendered)
         return True
 
     except Exception as e:
@@ -385,360 +385,350 @@ def select_eur_currency(driver):
         return False
 
 
-def extract_flight_prices(driver):
-    """Extract flight prices from the page."""
-    flight_data = []
+# Visible, sized result cards plus the page text, collected in one WebDriver call
+FLIGHT_CANDIDATES_JS = """
+const limit = arguments[0];
+const candidates = [];
+for (const node of document.querySelectorAll("div[jsaction*='click']")) {
+    const visible = node.checkVisibility
+        ? node.checkVisibility({opacityProperty: true, visibilityProperty: true})
+        : node.offsetParent !== null;
+    if (!visible) continue;
 
-    # Find flight elements
-    flight_elements = driver.find_elements(By.CSS_SELECTOR, "div[jsaction*='click']")
+    // Skip small elements
+    const rect = node.getBoundingClientRect();
+    if (rect.height < 50 || rect.width < 200) continue;
 
-    if flight_elements:
-        visible_flights = 0
-        for flight_element in flight_elements:
-            try:
-                if not flight_element.is_displayed():
-                    continue
+    candidates.push(node.innerText);
+    if (candidates.length >= limit) break;
+}
+return {candidates: candidates, body: document.body.innerText};
+"""
+MAX_FLIGHT_CANDIDATES = 10
 
-                # Skip small elements
-                element_size = flight_element.size
-                if element_size['height'] < 50 or element_size['width'] < 200:
-                    continue
 
-                visible_flights += 1
-                if visible_flights > 10:
-                    break
+def snapshot_flight_candidates(driver, limit=MAX_FLIGHT_CANDIDATES):
+    """Collect candidate flight card texts and the body text with a single execute_script."""
+    return driver.execute_script(FLIGHT_CANDIDATES_JS, limit)
 
-                # Extract price from element text
-                text = flight_element.text
-                print(f"Checking flight element {visible_flights}: {text[:100]}...")
-
-                # Look for EUR prices
-                eur_price_patterns = [
-                    r"€\s*([0-9,]+)",           # €1,951
-                    r"EUR\s*([0-9,]+)",         # EUR 1951
-                    r"([0-9,]+)\s*€",           # 1951 €
-                    r"([0-9,]+)\s*EUR"          # 1951 EUR
-                ]
-
-                for pattern in eur_price_patterns:
-                    eur_price_match = re.search(pattern, text)
-                    if eur_price_match:
-                        price_value = int(eur_price_match.group(1).replace(",", ""))
-                        if 100 <= price_value <= 10000:
-                            price = f"€{eur_price_match.group(1)}"
-                            flight_data.append({'price': price, 'is_nonstop': True})
-                            print(f"Found EUR flight with price: {price}")
-                            break
-
-                # If no EUR found, try basic fallback currencies
-                if not any(re.search(pattern, text) for pattern in eur_price_patterns):
-                    # Basic fallback patterns for common currencies
-                    fallback_patterns = [
-                        (r"\$\s*([0-9,]+)", "USD", 50, 5000),
-                        (r"£\s*([0-9,]+)", "GBP", 50, 4000),
-                        (r"(DKK)\s*([0-9,]+)", "DKK", 400, 35000),
-                        (r"(AFN)\s*([0-9,]+)", "AFN", 5000, 500000),
-                        (r"([0-9,]+)\s*kr", "kr", 500, 50000)
-                    ]
-
-                    for pattern, currency_code, min_val, max_val in fallback_patterns:
-                        price_match = re.search(pattern, text, re.IGNORECASE)
-                        if price_match:
-                            price_value_str = price_match.group(1) if len(price_match.groups()) == 1 else price_match.group(2)
-                            try:
-                                price_value = int(price_value_str.replace(",", ""))
-                                if min_val <= price_value <= max_val:
-                                    price = f"{currency_code} {price_value_str}"
-                                    flight_data.append({'price': price, 'is_nonstop': True})
-                                    print(f"Found {currency_code} flight with price: {price}")
-                                    break
-                            except ValueError:
-                                continue
 
-            except Exception as e:
-                print(f"Error processing flight element: {e}")
+def snapshot_flight_candidates_per_element(driver, limit=MAX_FLIGHT_CANDIDATES):
+    """Collect the same snapshot with one WebDriver round trip per element property.
+
+    This is the original extraction path, kept for benchmarking against
+    snapshot_flight_candidates().
+    """
+    candidates = []
+    for flight_element in driver.find_elements(By.CSS_SELECTOR, "div[jsaction*='click']"):
+        try:
+            if not flight_element.is_displayed():
                 continue
 
-        print(f"Processed {visible_flights} visible flight elements")
+            # Skip small elements
+            element_size = flight_element.size
+            if element_size['height'] < 50 or element_size['width'] < 200:
+                continue
 
-    # Fallback: extract from page text if no flight elements found
-    if not flight_data:
-        print("No flight elements found, trying page text extraction")
-        page_text = driver.find_element(By.TAG_NAME, "body").text
-
-        # Try to find EUR prices in page text
-        eur_price_patterns = [
-            r"€\s*([0-9,]+)",
-            r"EUR\s*([0-9,]+)",
-            r"([0-9,]+)\s*€",
-            r"([0-9,]+)\s*EUR"
-        ]
+            candidates.append(flight_element.text)
+            if len(candidates) >= limit:
+                break
+        except Exception as e:
+            print(f"Error processing flight element: {e}")
+            continue
 
-        all_eur_matches = []
-        for pattern in eur_price_patterns:
-            matches = re.findall(pattern, page_text)
-            all_eur_matches.extend(matches)
+    return {'candidates': candidates, 'body': driver.find_element(By.TAG_NAME, "body").text}
 
-        if all_eur_matches:
-            valid_prices = []
-            seen_prices = set()
 
-            for price in all_eur_matches:
-                try:
-                    price_value = int(price.replace(",", ""))
-                    if 100 <= price_value <= 10000 and price_value not in seen_prices:
-                        valid_prices.append(f"€{price}")
-                        seen_prices.add(price_value)
-                        if len(valid_prices) >= 3:
-                            break
-                except:
-                    continue
+def benchmark_extraction(driver, rounds=3):
+    """Time the single-call snapshot against the per-element path on the current page."""
+    timings = {}
+    for name, collect in (("snapshot", snapshot_flight_candidates),
+                          ("per_element", snapshot_flight_candidates_per_element)):
+        start = time.time()
+        for _ in range(rounds):
+            flight_data = parse_flight_prices(collect(driver))
+        timings[name] = (time.time() - start) / rounds
+        print(f"Extraction benchmark [{name}]: {timings[name] * 1000:.0f} ms/round, {len(flight_data)} flights")
 
-            for price in valid_prices:
-                flight_data.append({'price': price, 'is_nonstop': True})
-                print(f"Extracted EUR price from page text: {price}")
+    if timings["snapshot"] > 0:
+        print(f"Extraction benchmark: snapshot is {timings['per_element'] / timings['snapshot']:.1f}x faster")
+    return timings
 
-        # Basic fallback to other currencies if no EUR found
-        if not flight_data:
-            fallback_patterns = [
-                (r"\$\s*([0-9,]+)", "USD", 50, 5000),
-                (r"(DKK)\s*([0-9,]+)", "DKK", 400, 35000),
-                (r"(AFN)\s*([0-9,]+)", "AFN", 5000, 500000),
-                (r"([0-9,]+)\s*kr", "kr", 500, 50000)
-            ]
-
-            for pattern, currency_code, min_val, max_val in fallback_patterns:
-                matches = re.findall(pattern, page_text, re.IGNORECASE)
-                if matches:
-                    for match in matches[:2]:  # Only take first 2 matches
-                        try:
-                            price_value_str = match[1] if isinstance(match, tuple) and len(match) > 1 else match
-                            price_value = int(price_value_str.replace(",", ""))
-                            if min_val <= price_value <= max_val:
-                                price = f"{currency_code} {price_value_str}"
-                                flight_data.append({'price': price, 'is_nonstop': True})
-                                print(f"Extracted {currency_code} price: {price}")
-                        except (ValueError, IndexError):
-                            continue
-                    if flight_data:  # Stop after finding prices in one currency
-                        break
 
-    print(f"Total flight data extracted: {len(flight_data)} flights")
-    return flight_data
+def extract_flight_prices(driver):
+    """Extract flight prices from the page."""
+    return parse_flight_prices(snapshot_flight_candidates(driver))
 
 
-def get_nordvpn_countries():
-    """Get list of available NordVPN countries."""
-    try:
-        print("Getting available NordVPN countries...")
-        result = subprocess.run(['nordvpn', 'countries'], capture_output=True, text=True, timeout=30)
-
-        if result.returncode == 0:
-            # Parse the output to extract country names
-            countries_text = result.stdout.strip()
-            print(f"NordVPN countries output: {countries_text[:200]}...")
-
-            # Split by lines and extract country names
-            # NordVPN typically outputs countries separated by commas or in a list format
-            countries = []
-
-            # Try different parsing approaches
-            if ',' in countries_text:
-                # Comma-separated format
-                countries = [country.strip() for country in countries_text.split(',') if country.strip()]
-            else:
-                # Line-separated format
-                lines = countries_text.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line and not line.startswith('-') and not line.startswith('Available'):
-                        # Split by whitespace and take country names
-                        parts = line.split()
-                        for part in parts:
-                            if len(part) > 2 and part.isalpha():
-                                countries.append(part)
-
-            # Remove duplicates and filter valid country names
-            unique_countries = []
-            seen = set()
-            for country in countries:
-                country_clean = country.strip().replace(',', '').replace('.', '')
-                if (len(country_clean) > 2 and
-                    country_clean.isalpha() and
-                    country_clean.lower() not in seen and
-                    country_clean.lower() not in ['available', 'countries', 'nordvpn']):
-                    unique_countries.append(country_clean)
-                    seen.add(country_clean.lower())
-
-            print(f"Found {len(unique_countries)} available countries: {unique_countries[:10]}...")
-            return unique_countries
+EXTRACTION_MODES = ['dom', 'payload', 'auto']
 
-        else:
-            print(f"Error getting NordVPN countries: {result.stderr}")
-            return []
 
-    except subprocess.TimeoutExpired:
-        print("Timeout getting NordVPN countries")
-        return []
-    except Exception as e:
-        print(f"Error getting NordVPN countries: {e}")
-        return []
+def prepare_results_page(driver, deeplinked, snapshot_dir=None):
+    """Wait for the results to render, then apply the nonstop filter and EUR unless the deep link did."""
+    if wait_for(driver, 'main_content', EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='main']"))):
+        print("Main content loaded")
+    wait_for(driver, 'results_rendered', results_rendered)
+    if snapshot_dir:
+        save_snapshot(driver, snapshot_dir, 'results')
+
+    if deeplinked and deeplink_applied(driver):
+        print("Deep link applied: results are nonstop and in EUR, skipping filter and currency dialogs")
+        return
+    if deeplinked:
+        print("Deep link not reflected on the page, falling back to the filter and currency dialogs")
+
+    # Apply nonstop filter
+    apply_nonstop_filter(driver)
+    if snapshot_dir:
+        save_snapshot(driver, snapshot_dir, 'nonstop_filter')
+
+    # Select EUR currency
+    select_eur_currency(driver)
+    if snapshot_dir:
+        save_snapshot(driver, snapshot_dir, 'currency')
+
+
+def extract_flights(driver, extraction='dom', prepare_dom=None):
+    """Wait for and extract the results with the chosen extraction mode.
+
+    dom parses the rendered page once the network has settled. payload reads
+    the results response (or embedded page data) as soon as it has landed,
+    without waiting for rendering. auto tries payload first and falls back
+    to dom when it finds nothing. prepare_dom, if given, is called before
+    the page is parsed, to render and filter a page payload mode skipped.
+    """
+    if extraction in ('payload', 'auto'):
+        wait_for(driver, 'results_payload', payload_ready)
+        flight_data = extract_payload_prices(driver)
+        if flight_data or extraction == 'payload':
+            return flight_data
+        print("No payload results, falling back to page text extraction")
+
+    if prepare_dom:
+        prepare_dom()
+    wait_for(driver, 'network_idle', network_idle())
+    return extract_flight_prices(driver)
+
+
+def parse_flight_prices(snapshot):
+    """Parse flight prices and card details from a snapshot of candidate texts and the page text.
+
+    Returns a list of {'price': PriceMatch, 'details': FlightDetails} dicts.
+    Prices taken from the page text fallback have no details (None).
+    """
+    flight_data = []
+    flight_texts = snapshot['candidates']
 
+    if flight_texts:
+        for visible_flights, (text, prices) in enumerate(zip(flight_texts, parse_many(flight_texts)), 1):
+            print(f"Checking flight element {visible_flights}: {text[:100]}...")
 
-def connect_to_nordvpn_country(country):
-    """Connect to a specific NordVPN country."""
-    try:
-        print(f"Connecting to NordVPN country: {country}")
-        result = subprocess.run(['nordvpn', 'connect', country], capture_output=True, text=True, timeout=60)
+            # Prefer EUR, otherwise fall back to the first other currency found
+            price = select_price(prices)
+            if price:
+                details = parse_flight_details(text)
+                flight_data.append({'price': price, 'details': details})
+                print(f"Found {price.currency} flight with price: {format_price(price)} "
+                      f"({details.airline or 'unknown airline'}, {details.departure}-{details.arrival})")
 
-        if result.returncode == 0:
-            print(f"Successfully connected to {country}")
-            print(f"Connection output: {result.stdout.strip()}")
+        print(f"Processed {len(flight_texts)} visible flight elements")
 
-            # Wait a bit for connection to stabilize
-            time.sleep(10)
+    # Fallback: extract from page text if no flight elements found
+    if not flight_data:
+        print("No flight elements found, trying page text extraction")
+        page_prices = parse_prices(snapshot['body'])
+
+        # Up to three distinct EUR prices from the page text
+        seen_prices = set()
+        for price in page_prices:
+            if price.currency == 'EUR' and price.amount not in seen_prices:
+                flight_data.append({'price': price, 'details': None})
+                seen_prices.add(price.amount)
+                print(f"Extracted EUR price from page text: {format_price(price)}")
+                if len(seen_prices) >= 3:
+                    break
 
-            # Verify connection
-            status_result = subprocess.run(['nordvpn', 'status'], capture_output=True, text=True, timeout=30)
-            if status_result.returncode == 0:
-                print(f"Connection status: {status_result.stdout.strip()}")
+        # Basic fallback to other currencies if no EUR found
+        if not flight_data:
+            for currency in FALLBACK_CURRENCIES:
+                matches = [price for price in page_prices if price.currency == currency]
+                for price in matches[:2]:  # Only take first 2 matches
+                    flight_data.append({'price': price, 'details': None})
+                    print(f"Extracted {currency} price: {format_price(price)}")
+                if flight_data:  # Stop after finding prices in one currency
+                    break
 
-            return True
-        else:
-            print(f"Failed to connect to {country}: {result.stderr}")
-            return False
+    print(f"Total flight data extracted: {len(flight_data)} flights")
+    return flight_data
 
-    except subprocess.TimeoutExpired:
-        print(f"Timeout connecting to {country}")
-        return False
-    except Exception as e:
-        print(f"Error connecting to {country}: {e}")
-        return False
 
+def build_screenshot_path(origin, destination, depart_date, return_date, country=None):
+    """Return the screenshot file path for one search from one country."""
+    formatted_depart_date = depart_date.replace("-", "")
+    formatted_return_date = return_date.replace("-", "")
+    country_suffix = f"_{country}" if country else ""
+    return f"screenshots/{origin}_to_{destination}_from_{formatted_depart_date}_to_{formatted_return_date}{country_suffix}.png"
 
-def disconnect_nordvpn():
-    """Disconnect from NordVPN."""
-    try:
-        print("Disconnecting from NordVPN...")
-        result = subprocess.run(['nordvpn', 'disconnect'], capture_output=True, text=True, timeout=30)
 
-        if result.returncode == 0:
-            print("Successfully disconnected from NordVPN")
-            print(f"Disconnect output: {result.stdout.strip()}")
-            time.sleep(5)  # Wait for disconnection to complete
-            return True
-        else:
-            print(f"Error disconnecting from NordVPN: {result.stderr}")
-            return False
+SCREENSHOT_POLICIES = ['always', 'fallback', 'never']
+NAVIGATION_MODES = ['deeplink', 'query']
 
-    except subprocess.TimeoutExpired:
-        print("Timeout disconnecting from NordVPN")
-        return False
-    except Exception as e:
-        print(f"Error disconnecting from NordVPN: {e}")
-        return False
 
+def build_search_url(origin, destination, depart_date, return_date, navigation='deeplink'):
+    """Return (url, is_deeplink) for a search.
 
-def scrape_flight_data(origin, destination, depart_date, return_date, country=None):
-    """Scrape flight data from Google Flights."""
-    driver = setup_driver()
+    A deep link already asks for nonstop flights in EUR. Routes without a
+    known IATA code, and navigation='query', use the natural-language URL
+    that the filter and currency dialogs are then clicked through on.
+    """
+    if navigation == 'deeplink':
+        try:
+            return build_deeplink(origin, destination, depart_date, return_date), True
+        except ValueError as e:
+            print(f"Deep link not possible, using query URL: {e}")
+
+    base_url = f"https://www.google.com/travel/flights?q=Flights%20to%20{destination}%20from%20{origin}%20on%20{depart_date}%20through%20{return_date}"
+    return f"{base_url}&curr=EUR", False
+
+
+def deeplink_applied(driver):
+    """True when the loaded results already show the nonstop filter and EUR prices."""
+    return bool(nonstop_filter_active(driver)) and bool(currency_symbol_present("€")(driver))
+
+
+def needs_screenshot(policy, flight_data):
+    """Decide whether to keep a screenshot: always, never, or only when some price came without card details."""
+    if policy == 'fallback':
+        return not flight_data or not all(is_complete(flight['details']) for flight in flight_data)
+    return policy == 'always'
+
+
+def scrape_flight_data(origin, destination, depart_date, return_date, country=None, proxy=None, pool=None,
+                       benchmark=False, snapshot_root=None, screenshot_writer=None, screenshots='always',
+                       extraction='dom', block_resources=False, unblock_for_screenshot=False,
+                       resource_stats=None, navigation='deeplink', consent_cache=None, selector_stats=None):
+    """Scrape flight data from Google Flights.
+
+    With a DriverPool the browser is borrowed warm and handed back afterwards
+    instead of being launched and torn down for this one search. With
+    benchmark set, both extraction paths are timed on the final page. With
+    snapshot_root set, the page is saved after every stage for offline replay.
+    A ScreenshotWriter encodes the screenshot in the background instead of
+    writing Chrome's PNG directly. The screenshots policy decides whether a
+    screenshot is taken at all (see needs_screenshot), and extraction picks
+    how results are read (see extract_flights). With block_resources set,
+    images, fonts, analytics and ads are not loaded; unblock_for_screenshot
+    reloads the page with everything allowed before a screenshot is taken.
+    resource_stats records the page weight and load time of each search.
+    navigation picks a deep link or the query URL (see build_search_url).
+    A ConsentCache injects known consent cookies before navigating, and
+    SelectorStats orders selector fallback chains by what worked before
+    for this locale and country.
+
+    Returns a ScrapeResult with the search's records (none if it failed)
+    and the path of the screenshot kept for it.
+    """
+    driver = pool.acquire(proxy) if pool else setup_driver(proxy=proxy)
+    healthy = True
+    snapshot_dir = None
+    if snapshot_root:
+        snapshot_dir = snapshot_dir_for(snapshot_root, origin, destination, depart_date, return_date, country)
 
     try:
-        # Use the working EUR URL approach
-        base_url = f"https://www.google.com/travel/flights?q=Flights%20to%20{destination}%20from%20{origin}%20on%20{depart_date}%20through%20{return_date}"
-        url = f"{base_url}&curr=EUR"
+        url, deeplinked = build_search_url(origin, destination, depart_date, return_date, navigation)
 
         print(f"Trying URL approach 1: {url}")
+        reset_wait_timings(driver)
+        driver.selector_stats = selector_stats
+        driver.selector_context = f"{parse_qs(urlparse(url).query).get('hl', ['default'])[0]}/{country or 'default'}"
+        if block_resources or getattr(driver, 'resources_blocked', False):
+            set_resource_blocking(driver, block_resources)
+        # Snapshots should record the consent page, so known consent cookies are not injected then
+        consent_injected = consent_cache.inject(driver, url) if consent_cache and not snapshot_dir else False
         driver.get(url)
-        time.sleep(5)
+        wait_for(driver, 'page_load', document_ready)
+        if snapshot_dir:
+            save_snapshot(driver, snapshot_dir, 'landing')
 
         # Quick check if EUR symbols appear
-        page_text = driver.find_element(By.TAG_NAME, "body").text
-        if "€" in page_text:
+        if currency_symbol_present("€")(driver):
             print(f"SUCCESS: EUR symbols found with URL approach 1")
         else:
             print(f"No EUR symbols found with URL approach 1")
 
         # Handle consent page
-        if not handle_consent_page(driver):
+        if not pass_consent_page(driver, url, consent_cache, consent_injected):
             print("Could not handle consent page, but continuing anyway...")
-
-        # Wait for main content
-        try:
-            WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='main']")))
-            print("Main content loaded")
-        except TimeoutException:
-            print("Timeout waiting for main content to load")
-
-        time.sleep(10)  # Wait for flight results
-
-        # Apply nonstop filter
-        apply_nonstop_filter(driver)
-        time.sleep(10)  # Wait for filtered results
-
-        # Select EUR currency
-        select_eur_currency(driver)
-        time.sleep(10)  # Wait for currency change to take effect
-
-        # Take screenshot and extract prices
-        formatted_depart_date = depart_date.replace("-", "")
-        formatted_return_date = return_date.replace("-", "")
-        country_suffix = f"_{country}" if country else ""
-
-        # Ensure screenshots directory exists
-        os.makedirs("screenshots", exist_ok=True)
-        screenshot_file = f"screenshots/{origin}_to_{destination}_from_{formatted_depart_date}_to_{formatted_return_date}{country_suffix}.png"
-
-        print(f"Screenshot file: {screenshot_file}")
-
-        driver.save_screenshot(screenshot_file)
-        print(f"Screenshot saved to {screenshot_file}")
-
-        flight_data = extract_flight_prices(driver)
+        if snapshot_dir:
+            save_snapshot(driver, snapshot_dir, 'consent')
+
+        # A deep link carries the nonstop filter and currency in the results request itself,
+        # so payload extraction reads that response without waiting for the page to render.
+        # Otherwise the filters are applied on the rendered page first.
+        prepare = partial(prepare_results_page, driver, deeplinked, snapshot_dir)
+        if deeplinked and extraction in ('payload', 'auto'):
+            prepare_dom = prepare
+        else:
+            prepare()
+            prepare_dom = None
+
+        # Extract prices and card details, then take a screenshot only if they need one
+        flight_data = extract_flights(driver, extraction, prepare_dom)
+        scraped_at = time.time()
+        print_wait_report(driver)
+        if snapshot_dir:
+            save_snapshot(driver, snapshot_dir, 'final')
+
+        if benchmark:
+            benchmark_extraction(driver)
+        if resource_stats:
+            resource_stats.measure(driver, country)
+
+        screenshot_path = None
+        if needs_screenshot(screenshots, flight_data):
+            if block_resources and unblock_for_screenshot:
+                # Reload with images and fonts so the screenshot looks like the real page
+                set_resource_blocking(driver, False)
+                driver.refresh()
+                wait_for(driver, 'page_load', document_ready)
+                wait_for(driver, 'results_rendered', results_rendered)
+
+            # Ensure screenshots directory exists
+            os.makedirs("screenshots", exist_ok=True)
+            screenshot_file = build_screenshot_path(origin, destination, depart_date, return_date, country)
+
+            if screenshot_writer:
+                screenshot_writer.save(driver, screenshot_file)
+                screenshot_path = screenshot_writer.path_for(screenshot_file)
+                print(f"Screenshot queued for {screenshot_path}")
+            else:
+                print(f"Screenshot file: {screenshot_file}")
+                driver.save_screenshot(screenshot_file)
+                screenshot_path = screenshot_file
+                print(f"Screenshot saved to {screenshot_file}")
+        else:
+            print("Skipping screenshot: every price came with full flight details")
 
         # Flight data extracted, will be saved to CSV by main function
-
-        # Return DataFrame with country information
         if flight_data:
-            return pd.DataFrame([{
-                'Country': country,
-                'Airline': 'Various',
-                'Price': flight['price'],
-                'Departure': 'See screenshot',
-                'Arrival': 'See screenshot',
-                'Duration': 'See screenshot',
-                'Stops': 'Nonstop'
-            } for flight in flight_data])
+            records = [from_price(flight['price'], country, scraped_at, flight['details']) for flight in flight_data]
         else:
-            return pd.DataFrame([{
-                'Country': country,
-                'Airline': 'See screenshot',
-                'Price': 'No prices found',
-                'Departure': 'See screenshot',
-                'Arrival': 'See screenshot',
-                'Duration': 'See screenshot',
-                'Stops': 'Nonstop'
-            }])
+            records = [no_price(country, scraped_at)]
+        return ScrapeResult(records, screenshot_path)
 
     except Exception as e:
         print(f"Error in scrape_flight_data function: {e}")
-        return []
+        healthy = False
+        return ScrapeResult([])
 
     finally:
-        # Proper cleanup with temp directory removal
-        temp_dir = getattr(driver, 'temp_dir', None)
-        try:
-            driver.quit()
-        except:
-            pass
-
-        # Clean up temporary directory
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                print(f"Cleaned up temp directory: {temp_dir}")
-            except Exception as e:
-                print(f"Warning: Could not clean up temp directory {temp_dir}: {e}")
+        if pool and healthy:
+            pool.release(driver)
+        elif pool:
+            pool.discard(driver)
+        else:
+            # Proper cleanup with temp directory removal
+            teardown_driver(driver)
 
 
 def cleanup_old_temp_dirs():
@@ -766,117 +756,470 @@ def cleanup_old_temp_dirs():
         print(f"Warning: Could not clean up old temp directories: {e}")
 
 
-def main():
-    # Clean up any leftover temp directories first
-    cleanup_old_temp_dirs()
+def load_proxy_map(path):
+    """Load a {country: proxy_url} mapping from a JSON file."""
+    with open(path) as f:
+        proxy_map = json.load(f)
 
-    # Define flight search parameters
-    origin = "Copenhagen"
-    destination = "Antalya"
-    depart_date = "2025-10-17"
-    return_date = "2025-10-24"
+    if not isinstance(proxy_map, dict) or not all(isinstance(v, str) for v in proxy_map.values()):
+        raise ValueError(f"{path} must contain a JSON object mapping country names to proxy URLs")
+    return proxy_map
+
+
+CONNECT_RETRIES = 2
+CONNECT_BACKOFF = 5
 
-    print(f"Starting multi-country flight price comparison...")
-    print(f"Route: {origin} to {destination}")
-    print(f"Dates: {depart_date} to {return_date}")
-
-    # Get available NordVPN countries
-    countries = get_nordvpn_countries()
-    if not countries:
-        print("ERROR: No NordVPN countries available. NordVPN is required for this script.")
-        print("Please ensure NordVPN is installed and you are logged in.")
-        return
-    else:
-        print(f"Found {len(countries)} NordVPN countries to test: {countries}")
 
-    all_flight_data = []
-    successful_countries = []
-    failed_countries = []
+def connect_with_retry(vpn, country, health=None, retries=CONNECT_RETRIES, backoff=CONNECT_BACKOFF):
+    """Connect a VpnController to a country, retrying with exponential backoff.
 
-    # Disconnect from any existing VPN connection
-    disconnect_nordvpn()
+    A connect only counts once nordvpn status confirms the country.
 
-    for i, country in enumerate(countries, 1):
+    With a VpnHealth tracker the connect timeout adapts to the country's
+    history, every attempt is recorded, and retries stop once its circuit
+    opens. A connect whose egress could not be checked (echo endpoint down
+    or rate-limited) is neither recorded nor retried: it returns None and
+    the country is skipped, so an echo outage does not open its circuit.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            print(f"Retrying {country} in {delay}s (attempt {attempt + 1}/{retries + 1})")
+            time.sleep(delay)
+
+        start = time.time()
+        timeout = health.connect_timeout(country) if health else 60
+        connected = vpn.connect(country, timeout=timeout)
+        if connected is None:
+            print(f"Skipping {country}: its egress could not be verified")
+            return None
+        if health:
+            health.record(country, connected, time.time() - start)
+        if connected:
+            return True
+        if health and health.is_open(country):
+            print(f"Circuit for {country} is now open, giving up on it for this run")
+            break
+    return False
+
+
+def scrape_jobs_over_vpn(groups, on_result, vpn, current_country=None, switch_stats=None, health=None,
+                         **scrape_options):
+    """Connect to each country once and run all of its searches before switching.
+
+    groups maps each country to its searches, in the order to run them,
+    and vpn is the VpnController that switches between them. If the VPN is
+    already connected to current_country, that country is scraped without
+    reconnecting. on_result(job, result) is called after every search;
+    result is None if the search failed or the country could not be
+    connected, otherwise a ScrapeResult. Switch times are recorded in
+    switch_stats and connect outcomes in the VpnHealth tracker health.
+    Extra keyword arguments are passed on to scrape_flight_data. Returns
+    the seconds spent scraping.
+    """
+    switch_stats = switch_stats or SwitchStats()
+    scrape_seconds = 0.0
+
+    # Disconnect from any existing VPN connection we are not going to use
+    if current_country not in groups:
+        vpn.disconnect()
+        current_country = None
+
+    for i, (country, searches) in enumerate(groups.items(), 1):
         print(f"\n{'='*60}")
-        print(f"Processing country {i}/{len(countries)}: {country}")
+        print(f"Processing country {i}/{len(groups)}: {country} ({len(searches)} searches)")
         print(f"{'='*60}")
 
-        # Connect to VPN (required)
-        print(f"Connecting to {country}...")
-        if not connect_to_nordvpn_country(country):
-            print(f"Failed to connect to {country}, skipping...")
-            failed_countries.append(country)
-            continue
-        print(f"Successfully connected to {country}, proceeding with scraping...")
+        if country == current_country:
+            print(f"Already connected to {country}, no reconnect needed")
+        else:
+            switch_start = time.time()
+
+            # Connect to VPN (required)
+            print(f"Connecting to {country}...")
+            connected = connect_with_retry(vpn, country, health)
+            switch_stats.record(country, time.time() - switch_start, bool(connected))
+            if not connected:
+                print(f"Failed to connect to {country}, skipping...")
+                current_country = None
+                for search in searches:
+                    on_result(Job(country, search), None)
+                continue
+            current_country = country
+        print(f"Connected to {country}, proceeding with scraping...")
 
-        try:
-            # Scrape flight data for this country with clean browser
-            print(f"Creating clean browser session for {country}...")
-            flight_data = scrape_flight_data(origin, destination, depart_date, return_date, country)
-
-            if flight_data is not None and not flight_data.empty:
-                all_flight_data.append(flight_data)
-                successful_countries.append(country)
-                print(f"Successfully scraped data for {country}: {len(flight_data)} flights found")
-
-                # Save individual country CSV file
-                os.makedirs("prices", exist_ok=True)
-                country_suffix = f"_{country}"
-                individual_csv = f"prices/{origin}_to_{destination}_direct{country_suffix}.csv"
-                flight_data.to_csv(individual_csv, index=False)
-                print(f"Individual country data saved to {individual_csv}")
-            else:
-                print(f"No flight data found for {country}")
-                failed_countries.append(country)
+        scrape_start = time.time()
+        for search in searches:
+            try:
+                # Scrape flight data for this search with a clean (reset or new) browser
+                print(f"Searching {search.origin} to {search.destination}, "
+                      f"{search.depart_date} to {search.return_date} from {country}...")
+                flight_data = scrape_flight_data(*search, country, **scrape_options)
+            except Exception as e:
+                print(f"Error scraping data for {country}: {e}")
+                flight_data = None
+            on_result(Job(country, search), flight_data)
+        scrape_seconds += time.time() - scrape_start
 
-        except Exception as e:
-            print(f"Error scraping data for {country}: {e}")
-            failed_countries.append(country)
+    # Final VPN disconnect
+    vpn.disconnect()
+    return scrape_seconds
+
+
+def scrape_jobs_in_parallel(groups, proxy_map, workers, on_result, **scrape_options):
+    """Scrape several jobs at once, each worker egressing through its country's proxy.
+
+    on_result(job, result) is called from this thread as soon as each job
+    finishes with its ScrapeResult, or None if the worker raised. Extra
+    keyword arguments are passed on to scrape_flight_data.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(scrape_flight_data, *search, country, proxy_map[country], **scrape_options):
+                Job(country, search)
+            for country, searches in groups.items()
+            for search in searches
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+                print(f"Worker finished {job.country}: {job.search.origin} to {job.search.destination}, "
+                      f"{job.search.depart_date} to {job.search.return_date}")
+            except Exception as e:
+                print(f"Worker for {job.country} failed: {e}")
+                result = None
+            on_result(job, result)
 
-        # Add a small delay between countries for stability
-        if i < len(countries):
-            time.sleep(3)  # Brief pause between countries
 
-    # Final VPN disconnect
-    disconnect_nordvpn()
-
-    upload_all_to_s3()
-
-    # Combine all data and create consolidated report
-    if all_flight_data:
-        combined_data = pd.concat(all_flight_data, ignore_index=True)
-
-        # Save consolidated CSV
-        os.makedirs("prices", exist_ok=True)
-        consolidated_csv = f"prices/{origin}_to_{destination}_consolidated_prices.csv"
-        combined_data.to_csv(consolidated_csv, index=False)
-        print(f"\nConsolidated data saved to {consolidated_csv}")
-
-        # Print summary by country
-        print("\n" + "="*80)
-        print("FLIGHT PRICE SUMMARY BY COUNTRY")
-        print("="*80)
-
-        for country_name in combined_data['Country'].unique():
-            country_data = combined_data[combined_data['Country'] == country_name]
-            prices = country_data['Price'].tolist()
-            valid_prices = [p for p in prices if p != 'No prices found']
-
-            print(f"\n{country_name}:")
-            print(f"  Flights found: {len(country_data)}")
-            if valid_prices:
-                print(f"  Prices: {', '.join(valid_prices)}")
-            else:
-                print(f"  Prices: No valid prices found")
+def search_file_prefix(search):
+    """Return the file name prefix shared by all output files of one search."""
+    return (f"{search.origin}_to_{search.destination}"
+            f"_from_{search.depart_date.replace('-', '')}_to_{search.return_date.replace('-', '')}")
 
-        print(f"\n\nSUMMARY:")
-        print(f"Successful countries: {len(successful_countries)} - {successful_countries}")
-        print(f"Failed countries: {len(failed_countries)} - {failed_countries}")
-        print(f"Total flights found: {len(combined_data)}")
 
-    else:
-        print("\nNo flight data was collected from any country.")
+def save_country_results(flight_data, search, country):
+    """Save one country's flight records for a search to its own CSV file and return the path."""
+    os.makedirs("prices", exist_ok=True)
+    country_suffix = f"_{country}"
+    individual_csv = f"prices/{search_file_prefix(search)}_direct{country_suffix}.csv"
+    write_csv(flight_data, individual_csv)
+    print(f"Individual country data saved to {individual_csv}")
+    return individual_csv
+
+
+def write_consolidated_report(all_flight_data, search, successful_countries, failed_countries):
+    """Save one search's consolidated CSV, print its per-country summary and return the CSV path."""
+    print(f"\n{search.origin} to {search.destination}, {search.depart_date} to {search.return_date}")
+    if not all_flight_data:
+        print("No flight data was collected from any country.")
         print(f"Failed countries: {failed_countries}")
+        return None
+
+    # Save consolidated CSV
+    os.makedirs("prices", exist_ok=True)
+    consolidated_csv = f"prices/{search_file_prefix(search)}_consolidated_prices.csv"
+    write_csv(all_flight_data, consolidated_csv)
+    print(f"\nConsolidated data saved to {consolidated_csv}")
+
+    # Print summary by country
+    print("\n" + "="*80)
+    print("FLIGHT PRICE SUMMARY BY COUNTRY")
+    print("="*80)
+
+    records_by_country = OrderedDict()
+    for record in all_flight_data:
+        records_by_country.setdefault(record.country, []).append(record)
+
+    cheapest = {}
+    for country_name, country_data in records_by_country.items():
+        valid_records = sorted((r for r in country_data if r.amount_minor is not None),
+                               key=lambda r: r.amount_minor)
+
+        print(f"\n{country_name}:")
+        print(f"  Flights found: {len(country_data)}")
+        if valid_records:
+            print(f"  Prices: {', '.join(format_amount(r) for r in valid_records)}")
+            if valid_records[0].currency == 'EUR':
+                cheapest[country_name] = valid_records[0]
+        else:
+            print(f"  Prices: No valid prices found")
+
+    print(f"\n\nSUMMARY:")
+    print(f"Successful countries: {len(successful_countries)} - {successful_countries}")
+    print(f"Failed countries: {len(failed_countries)} - {failed_countries}")
+    print(f"Total flights found: {len(all_flight_data)}")
+    if cheapest:
+        country_name, record = min(cheapest.items(), key=lambda item: item[1].amount_minor)
+        print(f"Cheapest EUR price: {format_amount(record)} from {country_name}")
+    return consolidated_csv
+
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Compare Google Flights prices across NordVPN countries.")
+    parser.add_argument("--config",
+                        help="JSON search matrix of routes, date pairs and countries (see search_matrix.py). "
+                             "Defaults to Copenhagen to Antalya on 2025-10-17/2025-10-24 from every country.")
+    parser.add_argument("--reconnect-budget", type=int,
+                        help="Maximum number of VPN reconnects in this run; lower-priority countries are deferred")
+    parser.add_argument("--stale-after", type=float, default=DEFAULT_STALE_AFTER_HOURS,
+                        help=f"Hours after which a search counts as fully stale when ordering countries "
+                             f"(default: {DEFAULT_STALE_AFTER_HOURS})")
+    parser.add_argument("--history-db", default=DEFAULT_DB,
+                        help=f"SQLite file that every scraped price is appended to (default: {DEFAULT_DB})")
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="RUN_ID",
+                        help=f"Resume a crashed or partial run from its journal in {JOURNAL_DIR} (default: "
+                             f"the latest), scraping only searches that did not finish")
+    parser.add_argument("--upload-backfill", action="store_true",
+                        help="Upload every screenshot and price CSV not yet in S3, e.g. ones left behind by "
+                             "failed background uploads, and exit without scraping")
+    parser.add_argument("--countries-ttl", type=float, default=DEFAULT_TTL_HOURS,
+                        help=f"Hours the cached NordVPN country list is trusted (default: {DEFAULT_TTL_HOURS})")
+    parser.add_argument("--refresh-countries", action="store_true",
+                        help="Ask nordvpn for its country list even if the cached one is fresh")
+    parser.add_argument("--expand-cities", action="store_true",
+                        help="Scrape from every NordVPN city of each country instead of one server per country")
+    parser.add_argument("--vpn-group", metavar="GROUP",
+                        help="Connect to servers in this NordVPN server group (see `nordvpn groups`)")
+    parser.add_argument("--egress-url", default=DEFAULT_ECHO_URL,
+                        help="IP echo endpoint returning JSON with the caller's IP and country code, used to "
+                             "confirm each VPN switch (default: EGRESS_ECHO_URL or ip-api.com)")
+    parser.add_argument("--no-egress-check", action="store_true",
+                        help="Trust nordvpn status alone after a VPN switch")
+    parser.add_argument("--plan-only", action="store_true",
+                        help="Print the scrape plan and exit without scraping")
+    parser.add_argument("--proxy-map",
+                        help="JSON file mapping country names to proxy URLs. Countries are then scraped "
+                             "in parallel, each through its own proxy, instead of switching the host VPN.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of countries scraped at once with --proxy-map (default: 4)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never call webdriver_manager; use the cached chromedriver or one on PATH")
+    parser.add_argument("--benchmark-extraction", action="store_true",
+                        help="Time single-call price extraction against the per-element path on each page")
+    parser.add_argument("--extraction", choices=EXTRACTION_MODES, default="dom",
+                        help="Read prices from the rendered page (dom), from the results data payloads "
+                             "as soon as they arrive (payload), or payload with dom fallback (auto)")
+    parser.add_argument("--navigation", choices=NAVIGATION_MODES, default="deeplink",
+                        help="Open results through a deep link that already encodes nonstop and EUR, "
+                             "falling back to the dialogs if it is not applied (deeplink), or through "
+                             "the search query URL and the dialogs (query). Default: deeplink")
+    parser.add_argument("--no-consent-cache", action="store_true",
+                        help="Do not inject cached consent cookies; handle the consent page every time")
+    parser.add_argument("--no-selector-cache", action="store_true",
+                        help="Always try selector fallbacks in their configured order")
+    parser.add_argument("--block-resources", action="store_true",
+                        help="Do not load images, fonts, analytics or ads while scraping")
+    parser.add_argument("--unblock-for-screenshot", action="store_true",
+                        help="With --block-resources, reload the page with everything allowed before "
+                             "taking a screenshot")
+    parser.add_argument("--screenshots", choices=SCREENSHOT_POLICIES, default="fallback",
+                        help="When to keep a result screenshot: always, never, or only when some price "
+                             "came without airline, times, duration and stops (default: fallback)")
+    parser.add_argument("--screenshot-format", choices=SCREENSHOT_FORMATS, default="png",
+                        help="Encoding for result screenshots; both are lossless (default: png, optimised)")
+    parser.add_argument("--clip-screenshots", action="store_true",
+                        help="Capture only the results area instead of the whole window")
+    parser.add_argument("--save-snapshots", metavar="DIR",
+                        help="Save page HTML and screenshots after each stage for offline replay "
+                             "(see benchmarks/bench_replay.py)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.upload_backfill:
+        upload_all_to_s3()
+        return
+
+    # Clean up any leftover temp directories first
+    cleanup_old_temp_dirs()
+
+    # A resumed run repeats the searches and countries it was started with
+    journal = RunJournal.resume(args.resume) if args.resume else None
+    if args.resume and journal is None:
+        print(f"ERROR: No run journal '{args.resume}' found in {JOURNAL_DIR}")
+        return
+
+    # Define flight search parameters
+    config = load_config(args.config) if args.config else DEFAULT_CONFIG
+    searches = journal.searches if journal else expand_searches(config)
+
+    print(f"Starting multi-country flight price comparison...")
+    for search in searches:
+        print(f"Route: {search.origin} to {search.destination}, dates: {search.depart_date} to {search.return_date}")
+
+    countries = journal.countries if journal else config_countries(config)
+    catalogue = CountryCatalogue(ttl_hours=args.countries_ttl)
+    if args.vpn_group and args.vpn_group not in catalogue.groups():
+        print(f"ERROR: Unknown NordVPN server group '{args.vpn_group}'; available: {catalogue.groups()}")
+        return
+    if args.proxy_map:
+        proxy_map = load_proxy_map(args.proxy_map)
+        if countries is None:
+            countries = list(proxy_map)
+        missing = [country for country in countries if country not in proxy_map]
+        if missing:
+            print(f"Warning: no proxy configured for {missing}, skipping them")
+            countries = [country for country in countries if country in proxy_map]
+    elif countries is None:
+        # Available NordVPN countries, from the cached catalogue when it is fresh
+        countries = catalogue.countries(refresh=args.refresh_countries)
+        if not countries:
+            print("ERROR: No NordVPN countries available. NordVPN is required for this script.")
+            print("Please ensure NordVPN is installed and you are logged in.")
+            return
+        else:
+            print(f"Found {len(countries)} NordVPN countries to test: {countries}")
+    if args.expand_cities and not args.proxy_map and not journal:
+        countries = catalogue.expand_cities(countries)
+        print(f"Expanded to {len(countries)} city targets")
+
+    # Every price is appended to the history store; it also tells the
+    # scheduler when each search was last scraped
+    store = PriceStore(args.history_db)
+
+    # Every search runs for a country before the next VPN switch; stale and
+    # high-priority searches go first
+    finished = journal.finished() if journal else {}
+    jobs = [job for job in expand_jobs(searches, countries) if job not in finished]
+    if finished:
+        print(f"Skipping {len(finished)} searches finished before the resume")
+    groups = group_jobs_by_country(jobs)
+
+    # Countries whose VPN connects keep failing are skipped until their cooldown ends
+    health = None if args.proxy_map else VpnHealth()
+    unhealthy = [country for country in groups if health and health.is_open(country)]
+    if unhealthy:
+        print(f"Skipping {len(unhealthy)} countries with an open VPN circuit: {unhealthy}")
+        for country in unhealthy:
+            del groups[country]
+
+    # Each switch is confirmed by the country traffic actually leaves from
+    egress = None if args.proxy_map or args.no_egress_check else EgressVerifier(args.egress_url)
+    vpn = None if args.proxy_map else VpnController(egress_check=egress.verify if egress else None,
+                                                    group=args.vpn_group)
+    current_country = vpn.connected_country(groups) if vpn else None
+    plan = plan_batches(groups, current_country=current_country,
+                        reconnect_budget=None if args.proxy_map else args.reconnect_budget,
+                        last_scraped=store.last_scraped(), priorities=search_priorities(config),
+                        stale_after_hours=args.stale_after,
+                        country_weights={country: health.weight(country) for country in groups} if health else None)
+    print_plan(plan)
+    if args.plan_only:
+        store.close()
+        if vpn:
+            vpn.close()
+        return
+    groups = OrderedDict((batch.country, batch.searches) for batch in plan.batches)
+
+    # The home IP, which marks leaks, can only be seen without a tunnel, so
+    # a connection the plan does not keep is dropped before looking it up
+    if egress and current_country not in groups:
+        if current_country is not None:
+            vpn.disconnect()
+            current_country = None
+        egress.record_home()
+    if journal is None:
+        journal = RunJournal.start(searches, countries)
+
+    flight_data_by_search = {search: [] for search in searches}
+    successful_countries = {search: [] for search in searches}
+    failed_countries = {search: [] for search in searches}
+    for (country, search), flight_data in finished.items():
+        flight_data_by_search[search].extend(flight_data)
+        successful_countries[search].append(country)
+    for country, search in jobs:
+        if country in unhealthy:
+            failed_countries[search].append(country)
+
+    def record_result(job, result):
+        country, search = job
+        flight_data = result.records if result else None
+        if flight_data:
+            store.record(job, flight_data)
+            flight_data_by_search[search].extend(flight_data)
+            successful_countries[search].append(country)
+            print(f"Successfully scraped data for {country}: {len(flight_data)} flights found")
+
+            # Save individual country CSV file
+            individual_csv = save_country_results(flight_data, search, country)
+            upload_queue.enqueue(individual_csv)
+            journal.record(job, flight_data, individual_csv, result.screenshot)
+        else:
+            print(f"No flight data found for {country}")
+            failed_countries[search].append(country)
+            journal.record(job)
+
+    # Screenshots and CSVs are uploaded in the background as each search finishes
+    upload_queue = UploadQueue()
+    screenshot_writer = ScreenshotWriter(args.screenshot_format,
+                                         clip_selector=RESULTS_SELECTOR if args.clip_screenshots else None,
+                                         on_saved=upload_queue.enqueue)
+    resource_stats = ResourceStats()
+    consent_cache = None if args.no_consent_cache else ConsentCache()
+    selector_stats = None if args.no_selector_cache else SelectorStats()
+
+    try:
+        # Browsers are launched once and reset between searches, at most one per worker
+        pool = DriverPool(partial(setup_driver, offline=args.offline),
+                          max_drivers=args.workers if args.proxy_map else 1)
+        scrape_options = {
+            'pool': pool,
+            'benchmark': args.benchmark_extraction,
+            'snapshot_root': args.save_snapshots,
+            'screenshot_writer': screenshot_writer,
+            'screenshots': args.screenshots,
+            'extraction': args.extraction,
+            'block_resources': args.block_resources,
+            'unblock_for_screenshot': args.unblock_for_screenshot,
+            'resource_stats': resource_stats,
+            'navigation': args.navigation,
+            'consent_cache': consent_cache,
+            'selector_stats': selector_stats,
+        }
+
+        try:
+            if args.proxy_map:
+                # Parallel mode: every worker has its own egress, so the host VPN is left alone
+                print(f"Scraping through proxies with {args.workers} workers")
+                scrape_jobs_in_parallel(groups, proxy_map, args.workers, record_result, **scrape_options)
+            else:
+                switch_stats = SwitchStats()
+                scrape_seconds = scrape_jobs_over_vpn(groups, record_result, vpn, current_country=current_country,
+                                                      switch_stats=switch_stats, health=health, **scrape_options)
+                switch_stats.report(scrape_seconds)
+                vpn.report()
+                if egress:
+                    egress.report()
+                health.report(groups)
+        finally:
+            pool.close()
+
+        for search in searches:
+            consolidated_csv = write_consolidated_report(flight_data_by_search[search], search,
+                                                         successful_countries[search], failed_countries[search])
+            if consolidated_csv:
+                upload_queue.enqueue(consolidated_csv)
+        journal.finish()
+    finally:
+        # Flush pending screenshots and uploads, also when the run stops midway
+        screenshot_writer.close()
+        upload_queue.close()
+        resource_stats.save()
+        if health:
+            health.save()
+        if vpn:
+            vpn.close()
+        if consent_cache:
+            consent_cache.report()
+            consent_cache.save()
+        if selector_stats:
+            selector_stats.report()
+            selector_stats.save()
+        store.close()
 
 
 if __name__ == "__main__":
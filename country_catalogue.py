@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""NordVPN countries, cities and server groups, parsed once and cached on disk.
+
+    python country_catalogue.py [--cities] [--groups] [--refresh]
+
+Names keep NordVPN's underscores (United_States, Bosnia_And_Herzegovina),
+which is also how `nordvpn connect` expects them. A city target is written
+Country__City (e.g. Germany__Frankfurt) so it stays a single, file-name
+safe token throughout the scraper.
+"""
+import re
+import time
+import argparse
+import subprocess
+import threading
+
+from cache_files import cache_path, load_json, save_json
+from vpn_controller import NORDVPN_BIN
+from vpn_targets import city_target
+
+
+CACHE_FILE = cache_path("nordvpn_catalogue.json")
+DEFAULT_TTL_HOURS = 24
+
+# A NordVPN name: capitalised words joined by underscores (P2P, Bosnia_And_Herzegovina)
+NAME_PATTERN = re.compile(r"^[A-Z][\w'().-]*$")
+
+
+def parse_names(output):
+    """Parse `nordvpn countries`, `cities` or `groups` output into a list of names.
+
+    Handles comma, tab and column separated output, the CLI's spinner
+    characters, and skips notices such as "A new version of NordVPN is
+    available!".
+    """
+    names = []
+    for line in output.splitlines():
+        line = line.strip().lstrip("-\\|/ \r")
+        if not line or line.endswith(("!", ".", ":")) or re.search(r"\b[a-z]+ [a-z]+\b", line):
+            continue
+        for name in re.split(r"[,\s]+", line):
+            if NAME_PATTERN.match(name) and name not in names:
+                names.append(name)
+    return names
+
+
+class CountryCatalogue:
+    """Cached answers from the nordvpn CLI, refreshed after ttl_hours."""
+
+    def __init__(self, path=CACHE_FILE, ttl_hours=DEFAULT_TTL_HOURS, binary=None):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.binary = binary or NORDVPN_BIN
+        self.cache = load_json(path)
+        self.lock = threading.Lock()
+
+    def _list(self, key, *command, refresh=False):
+        """Return a cached name list, running the CLI only when it is missing or stale."""
+        with self.lock:
+            entry = self.cache.get(key)
+        if entry and not refresh and time.time() - entry['fetched_at'] < self.ttl:
+            return entry['names']
+
+        try:
+            result = subprocess.run([self.binary, *command], capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Error running nordvpn {' '.join(command)}: {e}")
+            result = None
+        if result is None or result.returncode != 0:
+            if result is not None:
+                print(f"Error running nordvpn {' '.join(command)}: {result.stderr.strip()}")
+            # A stale list beats none at all
+            return entry['names'] if entry else []
+
+        names = parse_names(result.stdout)
+        with self.lock:
+            self.cache[key] = {'fetched_at': time.time(), 'names': names}
+            save_json(self.path, self.cache)
+        return names
+
+    def countries(self, refresh=False):
+        return self._list('countries', 'countries', refresh=refresh)
+
+    def cities(self, country, refresh=False):
+        return self._list(f"cities/{country}", 'cities', country, refresh=refresh)
+
+    def groups(self, refresh=False):
+        return self._list('groups', 'groups', refresh=refresh)
+
+    def expand_cities(self, countries):
+        """Replace each country by one Country__City target per city (countries without cities stay)."""
+        targets = []
+        for country in countries:
+            cities = self.cities(country)
+            if cities:
+                targets.extend(city_target(country, city) for city in cities)
+            else:
+                targets.append(country)
+        return targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the cached NordVPN country catalogue.")
+    parser.add_argument("--cities", action="store_true", help="List every country's cities")
+    parser.add_argument("--groups", action="store_true", help="List server groups")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the cache and ask nordvpn again")
+    args = parser.parse_args()
+
+    catalogue = CountryCatalogue()
+    countries = catalogue.countries(refresh=args.refresh)
+    print(f"{len(countries)} countries")
+    for country in countries:
+        cities = catalogue.cities(country, refresh=args.refresh) if args.cities else []
+        print(f"  {country}" + (f": {', '.join(cities)}" if cities else ""))
+    if args.groups:
+        print(f"Groups: {', '.join(catalogue.groups(refresh=args.refresh))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Build Google Flights deep links that carry the whole search in the tfs parameter.
+
+The tfs value is a base64url-encoded protobuf message:
+
+    Info {
+      repeated FlightData data = 3;     // one per direction
+      repeated Passenger passengers = 8;
+      Seat seat = 9;
+      Trip trip = 19;
+    }
+    FlightData {
+      string date = 2;                  // YYYY-MM-DD
+      optional int32 max_stops = 5;     // 0 = nonstop only
+      Airport from_flight = 13;
+      Airport to_flight = 14;
+    }
+    Airport { string airport = 2; }     // IATA code
+
+Currency and language are ordinary curr= and hl= query parameters, so a
+deep link opens on results that are already nonstop-only and in EUR.
+"""
+import base64
+from urllib.parse import urlencode
+
+
+FLIGHTS_URL = "https://www.google.com/travel/flights/search"
+
+# City names used in search configs, mapped to their main airport
+IATA_CODES = {
+    'Copenhagen': 'CPH',
+    'Antalya': 'AYT',
+    'Billund': 'BLL',
+    'Aarhus': 'AAR',
+    'Aalborg': 'AAL',
+    'Stockholm': 'ARN',
+    'Oslo': 'OSL',
+    'Helsinki': 'HEL',
+    'Berlin': 'BER',
+    'Hamburg': 'HAM',
+    'Amsterdam': 'AMS',
+    'London': 'LHR',
+    'Paris': 'CDG',
+    'Istanbul': 'IST',
+    'Izmir': 'ADB',
+    'Dalaman': 'DLM',
+    'Bodrum': 'BJV',
+}
+
+CABINS = {'economy': 1, 'premium_economy': 2, 'business': 3, 'first': 4}
+ROUND_TRIP = 1
+ADULT = 1
+
+
+def iata_code(place):
+    """Return the IATA code for a city name, or the place itself if it already is one."""
+    if len(place) == 3 and place.isalpha() and place.isupper():
+        return place
+    try:
+        return IATA_CODES[place]
+    except KeyError:
+        raise ValueError(f"No IATA code known for '{place}'; add it to deeplink.IATA_CODES") from None
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _int_field(number, value):
+    return _varint(number << 3) + _varint(value)
+
+
+def _bytes_field(number, value):
+    if isinstance(value, str):
+        value = value.encode()
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def _flight_data(date, origin, destination, max_stops):
+    message = _bytes_field(2, date)
+    if max_stops is not None:
+        message += _int_field(5, max_stops)
+    message += _bytes_field(13, _bytes_field(2, origin))
+    message += _bytes_field(14, _bytes_field(2, destination))
+    return message
+
+
+def build_tfs(origin, destination, depart_date, return_date, max_stops=0, cabin='economy', adults=1):
+    """Encode a round trip search as a tfs parameter value."""
+    origin, destination = iata_code(origin), iata_code(destination)
+    message = _bytes_field(3, _flight_data(depart_date, origin, destination, max_stops))
+    message += _bytes_field(3, _flight_data(return_date, destination, origin, max_stops))
+    for _ in range(adults):
+        message += _int_field(8, ADULT)
+    message += _int_field(9, CABINS[cabin])
+    message += _int_field(19, ROUND_TRIP)
+    return base64.urlsafe_b64encode(message).decode().rstrip("=")
+
+
+def build_deeplink(origin, destination, depart_date, return_date, currency='EUR', language='en', **search):
+    """Return a Google Flights URL for the search; extra keywords go to build_tfs()."""
+    tfs = build_tfs(origin, destination, depart_date, return_date, **search)
+    return f"{FLIGHTS_URL}?{urlencode({'tfs': tfs, 'hl': language, 'curr': currency})}"
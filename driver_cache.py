@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Resolve the chromedriver binary once per installed Chrome version."""
+import os
+import re
+import time
+import shutil
+import threading
+import subprocess
+
+from cache_files import cache_path, load_json, save_json
+
+
+CACHE_FILE = cache_path("chromedriver.json")
+
+# Places to look for the installed Chrome, in order
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+_resolved = {}
+_lock = threading.Lock()
+
+
+def get_chrome_version():
+    """Return the installed Chrome version string, or None if Chrome is not found."""
+    if 'chrome_version' in _resolved:
+        return _resolved['chrome_version']
+
+    version = None
+    for binary in CHROME_BINARIES:
+        path = shutil.which(binary) or (binary if os.path.isfile(binary) else None)
+        if not path:
+            continue
+        try:
+            result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        match = re.search(r"(\d+\.\d+\.\d+\.\d+)", result.stdout)
+        if match:
+            version = match.group(1)
+            break
+
+    _resolved['chrome_version'] = version
+    return version
+
+
+def load_cache():
+    """Load the {chrome_version: chromedriver_path} cache."""
+    return load_json(CACHE_FILE)
+
+
+def save_cache(cache):
+    """Write the driver cache atomically."""
+    save_json(CACHE_FILE, cache)
+
+
+def _offline_fallback(cache, chrome_version):
+    """Pick a usable chromedriver without touching the network."""
+    major = chrome_version.split(".")[0] if chrome_version else None
+
+    # Prefer a cached driver for the same major version, then any cached driver
+    candidates = sorted(cache.items(), key=lambda item: item[0].split(".")[0] != major)
+    for _, path in candidates:
+        if os.path.isfile(path):
+            return path
+
+    return shutil.which("chromedriver")
+
+
+def resolve_chromedriver_path(offline=False):
+    """Return a chromedriver path, calling webdriver_manager only on a cache miss.
+
+    The result is cached on disk keyed by the installed Chrome version and
+    in memory for the rest of the process. In offline mode webdriver_manager
+    is never called; a cached driver or one on PATH is used instead.
+    """
+    with _lock:
+        if 'driver_path' in _resolved:
+            return _resolved['driver_path']
+
+        start = time.time()
+        chrome_version = get_chrome_version()
+        cache = load_cache()
+        path = cache.get(chrome_version) if chrome_version else None
+
+        if path and os.path.isfile(path):
+            print(f"Using cached chromedriver for Chrome {chrome_version}: {path}")
+        elif offline:
+            path = _offline_fallback(cache, chrome_version)
+            if not path:
+                raise RuntimeError("Offline mode: no cached chromedriver and none on PATH. "
+                                   "Run once with network access to populate the cache.")
+            print(f"Offline mode: using chromedriver {path}")
+        else:
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            if chrome_version:
+                cache[chrome_version] = path
+                save_cache(cache)
+            print(f"Resolved chromedriver via webdriver_manager: {path}")
+
+        print(f"Chromedriver resolution took {time.time() - start:.2f}s")
+        _resolved['driver_path'] = path
+        return path
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Pool of warm Chrome sessions reused across countries."""
+import os
+import shutil
+import threading
+from urllib.parse import urlparse
+from selenium.common.exceptions import WebDriverException
+
+
+# Origins whose storage is always cleared between countries
+RESET_ORIGINS = [
+    "https://www.google.com",
+    "https://consent.google.com",
+    "https://accounts.google.com",
+]
+
+
+def teardown_driver(driver):
+    """Quit a driver and remove its temporary user data directory."""
+    temp_dir = getattr(driver, 'temp_dir', None)
+    try:
+        driver.quit()
+    except:
+        pass
+
+    # Clean up temporary directory
+    if temp_dir and os.path.exists(temp_dir):
+        try:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            print(f"Cleaned up temp directory: {temp_dir}")
+        except Exception as e:
+            print(f"Warning: Could not clean up temp directory {temp_dir}: {e}")
+
+
+def reset_driver(driver):
+    """Return a used driver to a clean state through CDP.
+
+    Cookies, cache and per-origin storage are wiped, extra windows are
+    closed and the remaining tab is parked on about:blank, so the next
+    country starts from the same state as a freshly launched browser.
+    """
+    origins = set(RESET_ORIGINS)
+    current = urlparse(driver.current_url)
+    if current.scheme in ("http", "https"):
+        origins.add(f"{current.scheme}://{current.netloc}")
+
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    driver.get("about:blank")
+
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    for origin in origins:
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+
+    # Drop state the previous page left on the driver object
+    driver.wait_timings = []
+    driver.network_events = []
+    driver.inflight_requests = set()
+    try:
+        driver.get_log('performance')
+    except WebDriverException:
+        pass
+
+
+class DriverPool:
+    """Hands out warm Chrome drivers, keyed by the proxy they were launched with.
+
+    Chrome's proxy is fixed at launch, so a driver is only reused for the
+    same proxy (None for the host route). Drivers are reset between uses
+    and quit when the pool is closed or a driver is discarded. With
+    max_drivers set, launching a driver beyond it first quits the longest
+    idle driver of another proxy, so one proxy per country does not leave
+    a browser per proxy running for the rest of the run.
+    """
+
+    def __init__(self, factory, max_drivers=None):
+        self.factory = factory
+        self.max_drivers = max_drivers
+        self.idle = {}
+        self.idle_order = []
+        self.drivers = []
+        self.created = 0
+        self.reused = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, proxy=None):
+        """Return an idle driver for proxy, or launch a new one."""
+        with self.lock:
+            idle = self.idle.get(proxy, [])
+            driver = idle.pop() if idle else None
+            if driver is not None:
+                self.idle_order.remove(driver)
+
+        if driver is not None:
+            try:
+                reset_driver(driver)
+                with self.lock:
+                    self.reused += 1
+                print("Reusing warm browser session")
+                return driver
+            except WebDriverException as e:
+                print(f"Warm browser session could not be reset, replacing it: {e}")
+                self.discard(driver)
+
+        self._evict_idle()
+        driver = self.factory(proxy=proxy)
+        driver.pool_proxy = proxy
+        with self.lock:
+            self.drivers.append(driver)
+            self.created += 1
+        return driver
+
+    def _evict_idle(self):
+        """Quit the longest idle drivers until a new one fits under max_drivers."""
+        while True:
+            with self.lock:
+                if self.max_drivers is None or len(self.drivers) < self.max_drivers or not self.idle_order:
+                    return
+                driver = self.idle_order[0]
+            print("Browser pool full, closing the longest idle session")
+            self.discard(driver)
+
+    def release(self, driver):
+        """Put a driver back so the next acquire() for its proxy can reuse it."""
+        with self.lock:
+            self.idle.setdefault(driver.pool_proxy, []).append(driver)
+            self.idle_order.append(driver)
+
+    def discard(self, driver):
+        """Quit a driver that is broken or no longer wanted."""
+        with self.lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+            idle = self.idle.get(getattr(driver, 'pool_proxy', None), [])
+            if driver in idle:
+                idle.remove(driver)
+                self.idle_order.remove(driver)
+        teardown_driver(driver)
+
+    def close(self):
+        """Quit every driver the pool launched."""
+        with self.lock:
+            drivers = list(self.drivers)
+            self.drivers = []
+            self.idle = {}
+            self.idle_order = []
+        for driver in drivers:
+            teardown_driver(driver)
+        print(f"Browser pool closed: {self.created} launched, {self.reused} reused")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Check that traffic really leaves from the VPN country, over one pooled HTTP connection.
+
+The echo endpoint must return JSON with the caller's IP and ISO country
+code, like ip-api.com does:
+
+    {"status": "success", "country": "Germany", "countryCode": "DE", "query": "185.1.2.3"}
+
+("ip" and "country_code" are accepted too). Countries are compared by
+code, since NordVPN's names and the geo provider's differ (Czech_Republic
+vs "Czechia"); the country name is only compared for a NordVPN country
+missing from COUNTRY_CODES. EGRESS_ECHO_URL overrides the default, e.g.
+http://127.0.0.1:8765/ for tools/fake_ip_echo.py.
+"""
+import os
+import json
+import time
+import threading
+
+import urllib3
+
+
+DEFAULT_ECHO_URL = os.environ.get("EGRESS_ECHO_URL",
+                                  "http://ip-api.com/json/?fields=status,country,countryCode,query")
+ECHO_TIMEOUT = 3
+
+# ISO 3166-1 alpha-2 codes for the countries `nordvpn countries` lists
+COUNTRY_CODES = {
+    'Afghanistan': 'AF', 'Albania': 'AL', 'Algeria': 'DZ', 'Andorra': 'AD', 'Angola': 'AO',
+    'Argentina': 'AR', 'Armenia': 'AM', 'Australia': 'AU', 'Austria': 'AT', 'Azerbaijan': 'AZ',
+    'Bahamas': 'BS', 'Bangladesh': 'BD', 'Belgium': 'BE', 'Belize': 'BZ', 'Bermuda': 'BM',
+    'Bhutan': 'BT', 'Bolivia': 'BO', 'Bosnia_And_Herzegovina': 'BA', 'Brazil': 'BR',
+    'Brunei_Darussalam': 'BN', 'Bulgaria': 'BG', 'Cambodia': 'KH', 'Canada': 'CA',
+    'Cayman_Islands': 'KY', 'Chile': 'CL', 'Colombia': 'CO', 'Costa_Rica': 'CR', 'Croatia': 'HR',
+    'Cyprus': 'CY', 'Czech_Republic': 'CZ', 'Denmark': 'DK', 'Dominican_Republic': 'DO',
+    'Ecuador': 'EC', 'Egypt': 'EG', 'El_Salvador': 'SV', 'Estonia': 'EE', 'Finland': 'FI',
+    'France': 'FR', 'Georgia': 'GE', 'Germany': 'DE', 'Ghana': 'GH', 'Greece': 'GR',
+    'Greenland': 'GL', 'Guam': 'GU', 'Guatemala': 'GT', 'Honduras': 'HN', 'Hong_Kong': 'HK',
+    'Hungary': 'HU', 'Iceland': 'IS', 'India': 'IN', 'Indonesia': 'ID', 'Ireland': 'IE',
+    'Isle_Of_Man': 'IM', 'Israel': 'IL', 'Italy': 'IT', 'Jamaica': 'JM', 'Japan': 'JP',
+    'Jersey': 'JE', 'Kazakhstan': 'KZ', 'Kenya': 'KE', 'Lao_Peoples_Democratic_Republic': 'LA',
+    'Latvia': 'LV', 'Lebanon': 'LB', 'Liechtenstein': 'LI', 'Lithuania': 'LT', 'Luxembourg': 'LU',
+    'Malaysia': 'MY', 'Malta': 'MT', 'Mexico': 'MX', 'Moldova': 'MD', 'Monaco': 'MC',
+    'Mongolia': 'MN', 'Montenegro': 'ME', 'Morocco': 'MA', 'Myanmar': 'MM', 'Nepal': 'NP',
+    'Netherlands': 'NL', 'New_Zealand': 'NZ', 'Nigeria': 'NG', 'North_Macedonia': 'MK',
+    'Norway': 'NO', 'Pakistan': 'PK', 'Panama': 'PA', 'Papua_New_Guinea': 'PG', 'Paraguay': 'PY',
+    'Peru': 'PE', 'Philippines': 'PH', 'Poland': 'PL', 'Portugal': 'PT', 'Puerto_Rico': 'PR',
+    'Romania': 'RO', 'Serbia': 'RS', 'Singapore': 'SG', 'Slovakia': 'SK', 'Slovenia': 'SI',
+    'South_Africa': 'ZA', 'South_Korea': 'KR', 'Spain': 'ES', 'Sri_Lanka': 'LK', 'Sweden': 'SE',
+    'Switzerland': 'CH', 'Taiwan': 'TW', 'Thailand': 'TH', 'Trinidad_And_Tobago': 'TT',
+    'Tunisia': 'TN', 'Turkey': 'TR', 'Ukraine': 'UA', 'United_Arab_Emirates': 'AE',
+    'United_Kingdom': 'GB', 'United_States': 'US', 'Uruguay': 'UY', 'Uzbekistan': 'UZ',
+    'Venezuela': 'VE', 'Vietnam': 'VN',
+}
+_CODES_BY_KEY = {name.casefold(): code for name, code in COUNTRY_CODES.items()}
+
+
+def country_code(name):
+    """Return the ISO code for a nordvpn country name (any case, spaces or underscores), or None."""
+    return _CODES_BY_KEY.get(name.replace(" ", "_").casefold())
+
+
+def same_country(expected, reported_code, reported_name=None):
+    """True if a nordvpn country (United_Kingdom) is the echoed country (GB / United Kingdom)."""
+    code = country_code(expected)
+    if code and reported_code:
+        return code == reported_code.upper()
+    return bool(reported_name) and expected.replace("_", " ").casefold() == reported_name.casefold()
+
+
+class EgressVerifier:
+    """Looks up the egress IP and country and compares them with the VPN country.
+
+    The home IP (learned while disconnected) marks a leak whenever it shows
+    up behind a tunnel. Countries are cached per IP, so an endpoint that
+    stops returning them can still confirm IPs seen before. A check that
+    cannot run, or learns no country, leaves the switch unverified (None),
+    which is not held against the VPN the way a mismatch or leak is.
+    """
+
+    def __init__(self, echo_url=DEFAULT_ECHO_URL, timeout=ECHO_TIMEOUT):
+        self.echo_url = echo_url
+        self.http = urllib3.PoolManager(maxsize=1, retries=False, timeout=urllib3.Timeout(total=timeout))
+        self.home_ip = None
+        self.geo = {}
+        self.checks = []
+        self.lock = threading.Lock()
+
+    def lookup(self):
+        """Return (ip, country_code, country) as the echo endpoint sees this host; any may be None."""
+        response = self.http.request("GET", self.echo_url)
+        if response.status != 200:
+            raise urllib3.exceptions.HTTPError(f"echo endpoint returned HTTP {response.status}")
+        data = json.loads(response.data.decode())
+        ip = data.get('query') or data.get('ip')
+        geo = (data.get('countryCode') or data.get('country_code'), data.get('country'))
+        with self.lock:
+            if ip and any(geo):
+                self.geo[ip] = geo
+            elif ip:
+                geo = self.geo.get(ip, geo)
+        return (ip, *geo)
+
+    def record_home(self):
+        """Remember the IP seen without a tunnel, to recognise leaks later."""
+        try:
+            self.home_ip, _, country = self.lookup()
+            print(f"Home egress: {self.home_ip} ({country})")
+        except (urllib3.exceptions.HTTPError, ValueError) as e:
+            print(f"Could not look up the home egress IP: {e}")
+
+    def verify(self, country):
+        """True if traffic leaves from country, False if it leaves elsewhere or leaks, None if unverified."""
+        start = time.perf_counter()
+        try:
+            ip, code, reported = self.lookup()
+        except (urllib3.exceptions.HTTPError, ValueError) as e:
+            ok, reason = None, f"echo endpoint unavailable: {e}"
+        else:
+            if self.home_ip and ip == self.home_ip:
+                ok, reason = False, f"home IP {ip} is leaking"
+            elif not code and not reported:
+                ok, reason = None, f"no country for {ip}"
+            elif not same_country(country, code, reported):
+                ok, reason = False, f"{ip} is in {reported or code}"
+            else:
+                ok, reason = True, f"{ip} in {reported or code}"
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.checks.append((country, elapsed, ok))
+        outcome = {True: 'ok', False: 'FAILED', None: 'unverified'}[ok]
+        print(f"Egress check for {country}: {outcome}, {reason} ({elapsed * 1000:.0f} ms)")
+        return ok
+
+    def report(self):
+        """Print how many checks ran, how many failed or were unverified, and their mean latency."""
+        with self.lock:
+            checks = list(self.checks)
+        if checks:
+            failed = sum(1 for _, _, ok in checks if ok is False)
+            unverified = sum(1 for _, _, ok in checks if ok is None)
+            mean = sum(elapsed for _, elapsed, _ in checks) / len(checks)
+            print(f"Egress checks: {len(checks)} ({failed} failed, {unverified} unverified), "
+                  f"{mean * 1000:.0f} ms mean")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Parse airline, times, duration and stop count out of a Google Flights result card."""
+import re
+from collections import namedtuple
+
+from price_parser import PRICE_PATTERN
+
+
+FlightDetails = namedtuple('FlightDetails', ['airline', 'departure', 'arrival', 'duration_minutes', 'stops'])
+
+_TIME = r"\d{1,2}:\d{2}(?:\s*[AaPp]\.?\s?[Mm]\.?)?"
+
+# "10:05 AM – 2:30 PM+1" or "10:05 – 14:30"; Google puts a narrow no-break space before AM/PM
+TIMES_PATTERN = re.compile(rf"(?P<departure>{_TIME})\s*[–—-]\s*(?P<arrival>{_TIME})(?:\s*(?P<days>\+\d))?")
+DURATION_PATTERN = re.compile(r"\b(?P<hours>\d+)\s*(?:hr|h)\b(?:\s*(?P<minutes>\d+)\s*min\b)?|\b(?P<only_minutes>\d+)\s*min\b")
+STOPS_PATTERN = re.compile(r"\b(?:(?P<nonstop>Nonstop)|(?P<stops>\d+)\s+stops?)\b", re.IGNORECASE)
+
+# Card lines that are never the airline name
+ROUTE_PATTERN = re.compile(r"^[A-Z]{3}\s*[–—-]\s*[A-Z]{3}$")
+NOT_AIRLINE_PATTERN = re.compile(
+    r"CO2|emissions|round trip|one way|Separate tickets|Self transfer|Avoids|Operated by|%|^[+\-–]|^\d",
+    re.IGNORECASE,
+)
+
+
+def to_24h(text):
+    """Normalise a card time such as "2:30 PM" to "14:30"."""
+    match = re.match(r"(\d{1,2}):(\d{2})\s*(?:([AaPp])\.?\s?[Mm]\.?)?", text.strip())
+    hours, minutes, meridiem = int(match.group(1)), match.group(2), match.group(3)
+    if meridiem:
+        hours = hours % 12 + (12 if meridiem.lower() == 'p' else 0)
+    return f"{hours:02d}:{minutes}"
+
+
+def parse_duration(text):
+    """Return the first duration in text in minutes, or None."""
+    match = DURATION_PATTERN.search(text)
+    if not match:
+        return None
+    if match.group('only_minutes'):
+        return int(match.group('only_minutes'))
+    return int(match.group('hours')) * 60 + int(match.group('minutes') or 0)
+
+
+def parse_stops(text):
+    """Return the stop count in text (0 for Nonstop), or None."""
+    match = STOPS_PATTERN.search(text)
+    if not match:
+        return None
+    return 0 if match.group('nonstop') else int(match.group('stops'))
+
+
+def parse_airline(lines):
+    """Return the first card line that reads like an airline name, or None."""
+    for line in lines:
+        if (not re.search(r"[^\W\d_]", line) or TIMES_PATTERN.search(line) or DURATION_PATTERN.search(line)
+                or STOPS_PATTERN.search(line) or PRICE_PATTERN.search(line) or ROUTE_PATTERN.match(line)
+                or NOT_AIRLINE_PATTERN.search(line)):
+            continue
+        return line
+    return None
+
+
+def parse_flight_details(text):
+    """Parse one result card's text into FlightDetails; fields that are not found are None."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    departure = arrival = None
+    times = TIMES_PATTERN.search(text)
+    if times:
+        departure = to_24h(times.group('departure'))
+        arrival = to_24h(times.group('arrival')) + (times.group('days') or "")
+    return FlightDetails(parse_airline(lines), departure, arrival, parse_duration(text), parse_stops(text))
+
+
+def is_complete(details):
+    """True when a card gave everything the screenshot was kept for."""
+    return details is not None and None not in details
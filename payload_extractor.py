@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Read flight results from Google Flights' data payloads instead of the rendered page.
+
+Results arrive as GetShoppingResults XHR responses, and the first page of
+results can also be embedded in the HTML as AF_initDataCallback blobs.
+Both carry prices as plain numbers, so nothing depends on layout, currency
+formatting or the page having painted. Response bodies are read over CDP
+(Network.getResponseBody) for requests seen in the performance log.
+"""
+import re
+import json
+import base64
+from datetime import date
+
+from price_parser import PriceMatch, PRICE_RANGES
+from flight_details import FlightDetails
+from readiness import drain_network_events
+
+
+RESULTS_ENDPOINT = "GetShoppingResults"
+
+XSSI_PREFIX = ")]}'"
+
+# Embedded results blobs, returned as script texts in document order
+INIT_DATA_JS = """
+return Array.from(document.querySelectorAll('script'))
+    .map(script => script.textContent)
+    .filter(text => text.startsWith('AF_initDataCallback'));
+"""
+INIT_DATA_PATTERN = re.compile(r"data:(?P<data>\[.*\])\s*,\s*sideChannel:", re.DOTALL)
+
+
+def _get(node, *path):
+    """Follow list indexes into a payload, returning None where the shape differs."""
+    for index in path:
+        try:
+            node = node[index]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return node
+
+
+def results_requests(driver):
+    """Return [(request_id, finished)] for results XHRs on the current page, oldest first."""
+    drain_network_events(driver)
+    requests = {}
+    for event in driver.network_events:
+        params = event['params']
+        if event['method'] == 'Network.requestWillBeSent':
+            if RESULTS_ENDPOINT in params.get('request', {}).get('url', ''):
+                requests[params['requestId']] = False
+        elif event['method'] == 'Network.loadingFinished' and params.get('requestId') in requests:
+            requests[params['requestId']] = True
+    return list(requests.items())
+
+
+def embedded_results(driver):
+    """Return the data arrays of AF_initDataCallback blobs that hold results, in document order."""
+    blobs = (parse_init_data(script_text) for script_text in driver.execute_script(INIT_DATA_JS) or [])
+    return [data for data in blobs if parse_results_payload(data, None)]
+
+
+def payload_ready(driver):
+    """Wait condition: the newest results response has finished, or, before any
+    results request, the page embeds its results as init data."""
+    requests = results_requests(driver)
+    if requests:
+        return requests[-1][1]
+    return bool(embedded_results(driver))
+
+
+def fetch_response_body(driver, request_id):
+    """Fetch a finished response body over CDP, or None if Chrome no longer has it."""
+    try:
+        response = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+    except Exception as e:
+        print(f"Could not read response body {request_id}: {e}")
+        return None
+    body = response.get('body', '')
+    if response.get('base64Encoded'):
+        body = base64.b64decode(body).decode('utf-8', errors='replace')
+    return body
+
+
+def iter_rpc_payloads(body):
+    """Yield the decoded inner payloads of a batchexecute-style ("wrb.fr") response."""
+    if body.startswith(XSSI_PREFIX):
+        body = body[len(XSSI_PREFIX):]
+    for line in body.splitlines():
+        line = line.strip()
+        if not line.startswith("["):
+            continue  # blank lines and chunk lengths
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            continue
+        for entry in chunk:
+            if _get(entry, 0) == "wrb.fr" and isinstance(_get(entry, 2), str):
+                try:
+                    yield json.loads(entry[2])
+                except ValueError:
+                    continue
+
+
+def parse_init_data(script_text):
+    """Return the data array of one AF_initDataCallback script, or None."""
+    match = INIT_DATA_PATTERN.search(script_text)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group('data'))
+    except ValueError:
+        return None
+
+
+def _format_time(date_parts, time_parts, base_date=None):
+    """Format a payload [hour, minute] as HH:MM, with +N when it falls after base_date."""
+    if not time_parts:
+        return None
+    hours = time_parts[0] or 0
+    minutes = time_parts[1] if len(time_parts) > 1 and time_parts[1] else 0
+    text = f"{hours:02d}:{minutes:02d}"
+    if base_date and date_parts and list(date_parts) != list(base_date):
+        try:
+            days = (date(*date_parts) - date(*base_date)).days
+        except (TypeError, ValueError):
+            days = 0
+        if days > 0:
+            text += f"+{days}"
+    return text
+
+
+def parse_itinerary(itinerary, currency):
+    """Turn one payload itinerary into {'price': PriceMatch, 'details': FlightDetails}, or None.
+
+    The price is the last element of itinerary[1][0], in the currency the
+    page was requested in; legs live in itinerary[0][2].
+    """
+    amount = _get(itinerary, 1, 0, -1)
+    if not isinstance(amount, (int, float)):
+        return None
+    amount = int(round(amount))
+    min_val, max_val = PRICE_RANGES.get(currency, (0, float('inf')))
+    if not min_val <= amount <= max_val:
+        return None
+
+    legs = _get(itinerary, 0, 2) or []
+    first, last = _get(legs, 0), _get(legs, -1)
+    airlines = _get(itinerary, 0, 1)
+    details = FlightDetails(
+        airline=", ".join(airlines) if isinstance(airlines, list) and airlines else None,
+        departure=_format_time(_get(first, 20), _get(first, 8)),
+        arrival=_format_time(_get(last, 21), _get(last, 10), base_date=_get(first, 20)),
+        duration_minutes=_get(itinerary, 0, 9) or (sum(_get(leg, 11) or 0 for leg in legs) or None),
+        stops=len(legs) - 1 if legs else None,
+    )
+    return {'price': PriceMatch(amount, currency, None), 'details': details}
+
+
+def parse_results_payload(data, currency):
+    """Parse every itinerary in a results payload ("best" in data[2], the rest in data[3])."""
+    flight_data = []
+    for section in (2, 3):
+        for itinerary in _get(data, section, 0) or []:
+            flight = parse_itinerary(itinerary, currency)
+            if flight:
+                flight_data.append(flight)
+    return flight_data
+
+
+def extract_payload_prices(driver, currency='EUR'):
+    """Extract flights from the newest results response, else from the embedded page data.
+
+    currency is the one the page was requested in (the curr= URL parameter);
+    payload prices carry no currency of their own.
+    """
+    for request_id, finished in reversed(results_requests(driver)):
+        if not finished:
+            continue
+        body = fetch_response_body(driver, request_id)
+        flight_data = [flight for payload in iter_rpc_payloads(body or "")
+                       for flight in parse_results_payload(payload, currency)]
+        if flight_data:
+            print(f"Payload extraction: {len(flight_data)} flights from results response {request_id}")
+            return flight_data
+
+    for data in embedded_results(driver):
+        flight_data = parse_results_payload(data, currency)
+        if flight_data:
+            print(f"Payload extraction: {len(flight_data)} flights from embedded page data")
+            return flight_data
+
+    print("Payload extraction: no results payload found")
+    return []
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Multi-currency price parsing for Google Flights text, single texts or many at once."""
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+
+PriceMatch = namedtuple('PriceMatch', ['amount', 'currency', 'span'])
+
+# Sanity range (inclusive, whole currency units) for a round-trip fare
+PRICE_RANGES = {
+    'EUR': (100, 10000),
+    'USD': (50, 5000),
+    'GBP': (50, 4000),
+    'DKK': (400, 35000),
+    'AFN': (5000, 500000),
+    'kr': (500, 50000),
+}
+
+# Currencies tried, in order, when no EUR price is found
+FALLBACK_CURRENCIES = ['USD', 'GBP', 'DKK', 'AFN', 'kr']
+
+_AMOUNT = r"\d{1,3}(?:,\d{3})+|\d+"
+# A suffixed amount starts a number (not the tail of a time like 14:30 or a
+# day offset like +1) and is only separated from its currency by spaces
+# on the same line
+_SUFFIXED = r"(?<![\d,:+])"
+_SAME_LINE = r"[ \u00a0\u202f]*"
+
+# Every supported format as one alternation (the group name carries the currency);
+# parse_prices finds the same matches from the currency markers
+PRICE_PATTERN = re.compile(
+    rf"(?:€|EUR)\s*(?P<EUR_pre>{_AMOUNT})"
+    rf"|{_SUFFIXED}(?P<EUR_post>{_AMOUNT}){_SAME_LINE}(?:€|EUR)"
+    rf"|\$\s*(?P<USD>{_AMOUNT})"
+    rf"|£\s*(?P<GBP>{_AMOUNT})"
+    rf"|(?i:DKK)\s*(?P<DKK>{_AMOUNT})"
+    rf"|(?i:AFN)\s*(?P<AFN>{_AMOUNT})"
+    rf"|{_SUFFIXED}(?P<kr>{_AMOUNT}){_SAME_LINE}(?i:kr)"
+)
+
+# Currency markers found with str.find: marker -> (currency, amount before, amount after)
+_MARKERS = {
+    '€': ('EUR', True, True),
+    'EUR': ('EUR', True, True),
+    '$': ('USD', False, True),
+    '£': ('GBP', False, True),
+}
+# Case-insensitive markers, as in PRICE_PATTERN
+_FOLDED_MARKERS = {
+    'dkk': ('DKK', False, True),
+    'afn': ('AFN', False, True),
+    'kr': ('kr', True, False),
+}
+_FOLDED_PATTERN = re.compile("|".join(_FOLDED_MARKERS), re.IGNORECASE)
+_AMOUNT_PATTERN = re.compile(_AMOUNT)
+_PREFIXED_AMOUNT = re.compile(rf"\s*({_AMOUNT})")
+_SPACES = " \u00a0\u202f"
+_AMOUNT_CHARS = "0123456789,"
+
+# Never part of a price, so prices cannot span the texts parse_many joins
+_SEPARATOR = "\n\x00\n"
+
+
+def _suffixed_amount(text, marker_start):
+    """Return the span of the amount written before a currency marker, or None."""
+    end = marker_start
+    while end and text[end - 1] in _SPACES:
+        end -= 1
+    start = end
+    while start and text[start - 1] in _AMOUNT_CHARS:
+        start -= 1
+    if start == end or (start and text[start - 1] in ":+") or not _AMOUNT_PATTERN.fullmatch(text, start, end):
+        return None
+    return start, end
+
+
+def _candidates(text):
+    """Return (start, end, currency, amount_start, amount_end) for every PRICE_PATTERN match, in any order."""
+    markers = []
+    for marker, info in _MARKERS.items():
+        position = text.find(marker)
+        while position != -1:
+            markers.append((position, position + len(marker), info))
+            position = text.find(marker, position + 1)
+    for match in _FOLDED_PATTERN.finditer(text):
+        markers.append((match.start(), match.end(), _FOLDED_MARKERS[match.group().lower()]))
+
+    candidates = []
+    for start, end, (currency, before, after) in markers:
+        if before:
+            span = _suffixed_amount(text, start)
+            if span:
+                candidates.append((span[0], end, currency, span[0], span[1]))
+        if after:
+            match = _PREFIXED_AMOUNT.match(text, end)
+            if match:
+                candidates.append((start, match.end(), currency, match.start(1), match.end(1)))
+    return candidates
+
+
+def _in_range_prices(text):
+    """Return (amount, currency, start, end) for every in-range price in text, in order of appearance.
+
+    Finds the currency markers with str.find and reads the amount next to
+    each, rather than trying PRICE_PATTERN at every position; the result is
+    the same as a left-to-right PRICE_PATTERN scan that resumes just after
+    an out-of-range match (which may have consumed the sign of a real price,
+    as in "5 €1,234").
+    """
+    candidates = _candidates(text)
+    if not candidates:
+        return []
+    candidates.sort()
+    prices = []
+    position = 0
+    for start, end, currency, amount_start, amount_end in candidates:
+        if start < position:
+            continue
+        amount = int(text[amount_start:amount_end].replace(",", ""))
+        min_val, max_val = PRICE_RANGES[currency]
+        if min_val <= amount <= max_val:
+            prices.append((amount, currency, start, end))
+            position = end
+    return prices
+
+
+def parse_prices(text):
+    """Return every in-range price in text, in order of appearance."""
+    return [PriceMatch(amount, currency, (start, end)) for amount, currency, start, end in _in_range_prices(text)]
+
+
+def parse_many(texts):
+    """Parse many text blobs in one scan; returns one price list per blob, spans relative to it."""
+    starts = []
+    position = 0
+    for text in texts:
+        starts.append(position)
+        position += len(text) + len(_SEPARATOR)
+
+    results = [[] for _ in texts]
+    for amount, currency, start, end in _in_range_prices(_SEPARATOR.join(texts)):
+        index = bisect_right(starts, start) - 1
+        offset = starts[index]
+        results[index].append(PriceMatch(amount, currency, (start - offset, end - offset)))
+    return results
+
+
+def select_price(prices):
+    """Pick the price to report: the first EUR price, else the first in fallback order."""
+    for price in prices:
+        if price.currency == 'EUR':
+            return price
+    for currency in FALLBACK_CURRENCIES:
+        for price in prices:
+            if price.currency == currency:
+                return price
+    return None
+
+
+def format_price(price):
+    """Format a PriceMatch the way it is written to the CSV files."""
+    if price.currency == 'EUR':
+        return f"€{price.amount:,}"
+    return f"{price.currency} {price.amount:,}"
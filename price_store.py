@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Append-only SQLite store of every scraped price, for history and trend queries.
+
+    python price_store.py latest Copenhagen Antalya 2025-10-17 2025-10-24
+    python price_store.py trend Copenhagen Antalya [--days 90]
+"""
+import os
+import time
+import sqlite3
+import argparse
+from collections import namedtuple
+from records import format_amount
+
+
+DEFAULT_DB = os.path.join("prices", "history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    id INTEGER PRIMARY KEY,
+    origin TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    depart_date TEXT NOT NULL,
+    return_date TEXT NOT NULL,
+    country TEXT NOT NULL,
+    scraped_at REAL NOT NULL,
+    amount_minor INTEGER,
+    currency TEXT,
+    price_text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_prices_latest
+    ON prices (origin, destination, depart_date, return_date, country, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_prices_trend
+    ON prices (origin, destination, scraped_at);
+"""
+
+LatestPrice = namedtuple('LatestPrice', ['country', 'scraped_at', 'amount_minor', 'currency'])
+TrendPoint = namedtuple('TrendPoint', ['day', 'depart_date', 'return_date', 'min_minor', 'avg_minor', 'samples'])
+
+
+class PriceStore:
+    """Price history keyed by route, travel dates, country and scrape time.
+
+    Rows are only ever inserted. A scrape that found no price is stored
+    with a NULL amount so it still counts as the latest attempt.
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, job, records):
+        """Append one search's FlightRecords for one country."""
+        country, search = job
+        rows = [
+            (*search, country, record.scraped_at, record.amount_minor, record.currency,
+             format_amount(record) if record.amount_minor is not None else None)
+            for record in records
+        ]
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO prices (origin, destination, depart_date, return_date, country, scraped_at, "
+                "amount_minor, currency, price_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def last_scraped(self):
+        """Return {(country, (origin, destination, depart_date, return_date)): latest scrape time}."""
+        cursor = self.conn.execute(
+            "SELECT country, origin, destination, depart_date, return_date, MAX(scraped_at) FROM prices "
+            "GROUP BY origin, destination, depart_date, return_date, country"
+        )
+        return {(row[0], tuple(row[1:5])): row[5] for row in cursor}
+
+    def latest_prices(self, origin, destination, depart_date, return_date):
+        """Return the cheapest price per country from each country's most recent scrape of a search."""
+        cursor = self.conn.execute(
+            """
+            SELECT p.country, p.scraped_at, MIN(p.amount_minor), p.currency
+            FROM prices p
+            JOIN (
+                SELECT country, MAX(scraped_at) AS latest FROM prices
+                WHERE origin = ? AND destination = ? AND depart_date = ? AND return_date = ?
+                GROUP BY country
+            ) l ON p.country = l.country AND p.scraped_at = l.latest
+            WHERE p.origin = ? AND p.destination = ? AND p.depart_date = ? AND p.return_date = ?
+            GROUP BY p.country, p.currency
+            ORDER BY MIN(p.amount_minor) IS NULL, MIN(p.amount_minor)
+            """,
+            (origin, destination, depart_date, return_date) * 2,
+        )
+        return [LatestPrice(*row) for row in cursor]
+
+    def price_trend(self, origin, destination, since=None, currency='EUR'):
+        """Return the daily min and mean price per travel date pair for a route."""
+        cursor = self.conn.execute(
+            """
+            SELECT date(scraped_at, 'unixepoch'), depart_date, return_date,
+                   MIN(amount_minor), CAST(AVG(amount_minor) AS INTEGER), COUNT(*)
+            FROM prices
+            WHERE origin = ? AND destination = ? AND scraped_at >= ? AND currency = ?
+            GROUP BY 1, depart_date, return_date
+            ORDER BY 1, depart_date, return_date
+            """,
+            (origin, destination, since or 0, currency),
+        )
+        return [TrendPoint(*row) for row in cursor]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the scraped price history.")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest="query", required=True)
+    latest = subparsers.add_parser("latest", help="Latest price per country for one search")
+    latest.add_argument("origin")
+    latest.add_argument("destination")
+    latest.add_argument("depart_date")
+    latest.add_argument("return_date")
+    trend = subparsers.add_parser("trend", help="Daily price trend for a route")
+    trend.add_argument("origin")
+    trend.add_argument("destination")
+    trend.add_argument("--days", type=int, default=90)
+    trend.add_argument("--currency", default="EUR")
+    args = parser.parse_args()
+
+    store = PriceStore(args.db)
+    start = time.perf_counter()
+    if args.query == "latest":
+        rows = store.latest_prices(args.origin, args.destination, args.depart_date, args.return_date)
+        for row in rows:
+            scraped = time.strftime("%Y-%m-%d %H:%M", time.localtime(row.scraped_at))
+            price = f"{row.amount_minor / 100:,.0f} {row.currency}" if row.amount_minor is not None else "no price"
+            print(f"{row.country:<28} {price:>14}  scraped {scraped}")
+    else:
+        rows = store.price_trend(args.origin, args.destination, time.time() - args.days * 86400, args.currency)
+        for row in rows:
+            print(f"{row.day}  {row.depart_date} to {row.return_date}  "
+                  f"min {row.min_minor / 100:,.0f}  avg {row.avg_minor / 100:,.0f}  ({row.samples} prices)")
+    print(f"{len(rows)} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Condition-driven readiness waits used instead of fixed sleeps."""
+import json
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import (
+    TimeoutException, WebDriverException, JavascriptException, StaleElementReferenceException
+)
+
+
+# Upper bound in seconds for each named wait step
+STEP_TIMEOUTS = {
+    'page_load': 20,
+    'consent_dialog': 3,
+    'consent_dismissed': 3,
+    'main_content': 30,
+    'results_rendered': 20,
+    'stops_menu_open': 5,
+    'nonstop_filter_active': 10,
+    'currency_dialog_open': 5,
+    'currency_symbol': 15,
+    'network_idle': 10,
+    'results_payload': 10,
+}
+DEFAULT_TIMEOUT = 10
+POLL_FREQUENCY = 0.2
+
+# Errors raised while the page is still changing under a condition
+TRANSIENT_ERRORS = (JavascriptException, StaleElementReferenceException)
+
+# Network is considered idle once no more than NETWORK_MAX_INFLIGHT requests
+# (long-polling connections) have been open for NETWORK_QUIET_PERIOD seconds
+NETWORK_QUIET_PERIOD = 0.5
+NETWORK_MAX_INFLIGHT = 2
+
+# Performance log events kept on the driver for later inspection
+TRACKED_NETWORK_EVENTS = (
+    'Network.requestWillBeSent',
+    'Network.responseReceived',
+    'Network.loadingFinished',
+    'Network.loadingFailed',
+)
+
+RESULTS_RENDERED_JS = """
+const main = document.querySelector("div[role='main']") || document.body;
+const nodes = main.querySelectorAll("div[jsaction*='click']");
+for (const node of nodes) {
+    const rect = node.getBoundingClientRect();
+    if (rect.height >= 50 && rect.width >= 200 && node.offsetParent !== null && /\\d/.test(node.innerText || '')) {
+        return true;
+    }
+}
+return false;
+"""
+
+NONSTOP_FILTER_ACTIVE_JS = """
+const chips = document.querySelectorAll("button, div[role='button']");
+for (const chip of chips) {
+    const label = (chip.getAttribute('aria-label') || '') + ' ' + (chip.innerText || '');
+    if (/stops/i.test(label) && /non-?stop/i.test(label)) {
+        return true;
+    }
+}
+return false;
+"""
+
+DIALOG_CLOSED_JS = """
+const dialogs = document.querySelectorAll("div[role='dialog']");
+for (const dialog of dialogs) {
+    if (dialog.offsetParent !== null) {
+        return false;
+    }
+}
+return true;
+"""
+
+RESOURCE_COUNT_JS = "return performance.getEntriesByType('resource').length;"
+
+
+def wait_for(driver, step, condition, timeout=None):
+    """Wait until condition(driver) is truthy and record how long it took."""
+    if timeout is None:
+        timeout = STEP_TIMEOUTS.get(step, DEFAULT_TIMEOUT)
+
+    start = time.time()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY,
+                               ignored_exceptions=TRANSIENT_ERRORS).until(condition)
+    except TimeoutException:
+        result = False
+
+    elapsed = time.time() - start
+    record_wait(driver, step, elapsed, bool(result))
+    if not result:
+        print(f"Readiness: '{step}' not reached after {elapsed:.1f}s")
+    return result
+
+
+def record_wait(driver, step, elapsed, ok):
+    """Append a measured wait to the driver's timing list."""
+    if not hasattr(driver, 'wait_timings'):
+        driver.wait_timings = []
+    driver.wait_timings.append((step, elapsed, ok))
+
+
+def reset_wait_timings(driver):
+    """Forget timings recorded for a previous page."""
+    driver.wait_timings = []
+
+
+def print_wait_report(driver):
+    """Print the measured wait time for each step."""
+    timings = getattr(driver, 'wait_timings', [])
+    if not timings:
+        return
+    total = sum(elapsed for _, elapsed, _ in timings)
+    print(f"Readiness waits ({total:.1f}s total):")
+    for step, elapsed, ok in timings:
+        status = "ok" if ok else "timeout"
+        print(f"  {step:<24} {elapsed:6.2f}s  {status}")
+
+
+def document_ready(driver):
+    """The document has finished parsing and loading."""
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def results_rendered(driver):
+    """At least one sized, visible result card with text is on the page."""
+    return driver.execute_script(RESULTS_RENDERED_JS)
+
+
+def nonstop_filter_active(driver):
+    """The Stops chip reports the nonstop filter as applied."""
+    return driver.execute_script(NONSTOP_FILTER_ACTIVE_JS)
+
+
+def dialog_closed(driver):
+    """No dialog is visible any more."""
+    return driver.execute_script(DIALOG_CLOSED_JS)
+
+
+def currency_symbol_present(symbol):
+    """Build a condition that checks the page text for a currency symbol."""
+    def condition(driver):
+        return driver.execute_script("return document.body.innerText.indexOf(arguments[0]) !== -1;", symbol)
+    return condition
+
+
+def any_element_visible(by, selectors):
+    """Build a condition that returns the first visible element of any selector."""
+    def condition(driver):
+        for selector in selectors:
+            for element in driver.find_elements(by, selector):
+                if element.is_displayed():
+                    return element
+        return False
+    return condition
+
+
+def drain_network_events(driver):
+    """Move pending CDP network events from the performance log onto the driver."""
+    if not hasattr(driver, 'network_events'):
+        driver.network_events = []
+        driver.inflight_requests = set()
+
+    drained = 0
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+
+        method = message.get('method')
+        if method not in TRACKED_NETWORK_EVENTS:
+            continue
+
+        params = message.get('params', {})
+        drained += 1
+        driver.network_events.append({'method': method, 'params': params})
+
+        request_id = params.get('requestId')
+        if method == 'Network.requestWillBeSent':
+            driver.inflight_requests.add(request_id)
+        elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+            driver.inflight_requests.discard(request_id)
+
+    return drained
+
+
+def network_idle(quiet_period=NETWORK_QUIET_PERIOD, max_inflight=NETWORK_MAX_INFLIGHT):
+    """Build a condition that is met once the network has been quiet for quiet_period.
+
+    In-flight requests are tracked from CDP Network events in the performance
+    log. If that log is unavailable, the resource timing entry count is used
+    as a stand-in for network activity instead.
+    """
+    state = {'last_activity': time.time(), 'resource_count': None}
+
+    def condition(driver):
+        now = time.time()
+        try:
+            if drain_network_events(driver):
+                state['last_activity'] = now
+            busy = len(driver.inflight_requests) > max_inflight
+        except WebDriverException:
+            count = driver.execute_script(RESOURCE_COUNT_JS)
+            busy = count != state['resource_count']
+            state['resource_count'] = count
+
+        if busy:
+            state['last_activity'] = now
+            return False
+        return now - state['last_activity'] >= quiet_period
+
+    return condition
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Compact typed result records and their CSV/DataFrame output."""
+import csv
+from typing import NamedTuple, Optional
+
+from vpn_targets import split_target
+
+
+# Google shows Nordic prices as "kr"; the country decides which krone it is
+KRONE_BY_COUNTRY = {
+    'Denmark': 'DKK',
+    'Sweden': 'SEK',
+    'Norway': 'NOK',
+    'Iceland': 'ISK',
+}
+
+CSV_COLUMNS = ['Country', 'Airline', 'Price', 'Amount', 'Currency', 'Departure', 'Arrival', 'Duration', 'Stops',
+               'Scraped At']
+
+
+class FlightRecord(NamedTuple):
+    """One flight price from one country; fields that were not found (price, card details) are None."""
+    country: Optional[str]
+    amount_minor: Optional[int]
+    currency: Optional[str]
+    scraped_at: float
+    airline: Optional[str] = None
+    departure: Optional[str] = None
+    arrival: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    stops: Optional[int] = None
+
+
+class ScrapeResult(NamedTuple):
+    """One search's records and the screenshot kept for it, if any."""
+    records: list
+    screenshot: Optional[str] = None
+
+
+def currency_code(currency, country):
+    """Return the ISO code for a parsed currency, resolving "kr" by country."""
+    if currency == 'kr':
+        return KRONE_BY_COUNTRY.get(split_target(country or '')[0], currency)
+    return currency
+
+
+def from_price(price, country, scraped_at, details=None):
+    """Build a FlightRecord from a price_parser.PriceMatch and optional flight_details.FlightDetails."""
+    record = FlightRecord(country, price.amount * 100, currency_code(price.currency, country), scraped_at)
+    if details is None:
+        return record
+    return record._replace(airline=details.airline, departure=details.departure, arrival=details.arrival,
+                           duration_minutes=details.duration_minutes, stops=details.stops)
+
+
+def no_price(country, scraped_at):
+    """Build the record stored when a page showed no usable price."""
+    return FlightRecord(country, None, None, scraped_at)
+
+
+def format_amount(record):
+    """Format a record's price the way the CSV files have always shown it."""
+    if record.amount_minor is None:
+        return 'No prices found'
+    amount = f"{record.amount_minor // 100:,}"
+    if record.currency == 'EUR':
+        return f"€{amount}"
+    return f"{record.currency} {amount}"
+
+
+def format_duration(minutes):
+    """Format a duration in minutes as Google Flights shows it."""
+    if minutes is None:
+        return 'See screenshot'
+    return f"{minutes // 60} hr {minutes % 60} min"
+
+
+def format_stops(stops):
+    """Format a stop count as Google Flights shows it.
+
+    An unknown count is written as 'Nonstop', as the CSV always has: searches
+    are filtered to nonstop flights.
+    """
+    if stops is None or stops == 0:
+        return 'Nonstop'
+    return f"{stops} stop{'s' if stops > 1 else ''}"
+
+
+def to_row(record):
+    """Return one CSV row for a record, in CSV_COLUMNS order."""
+    return [
+        record.country,
+        record.airline or ('Various' if record.amount_minor is not None else 'See screenshot'),
+        format_amount(record),
+        f"{record.amount_minor / 100:.2f}" if record.amount_minor is not None else '',
+        record.currency or '',
+        record.departure or 'See screenshot',
+        record.arrival or 'See screenshot',
+        format_duration(record.duration_minutes),
+        format_stops(record.stops),
+        f"{record.scraped_at:.0f}",
+    ]
+
+
+def write_csv(records, path):
+    """Write records to a CSV file without going through pandas."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(to_row(record) for record in records)
+
+
+def records_to_dataframe(records):
+    """Build a DataFrame with numeric Amount column from records, for ad-hoc analysis."""
+    import pandas as pd
+    frame = pd.DataFrame([to_row(record) for record in records], columns=CSV_COLUMNS)
+    frame['Amount'] = pd.to_numeric(frame['Amount'], errors='coerce')
+    return frame
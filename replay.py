@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Save page snapshots during a live run and serve them locally for replay."""
+import os
+import re
+import json
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+
+# Stages at which the scraper saves a snapshot, in pipeline order. Each
+# snapshot shows the page right after that stage finished: landing is the
+# page as first loaded (with any consent dialog), results the rendered
+# results before the filter dialogs.
+SNAPSHOT_STAGES = ['landing', 'consent', 'results', 'nonstop_filter', 'currency', 'final']
+
+MANIFEST_FILE = "manifest.json"
+
+# Page scripts are dropped so a replayed page cannot reach the network or
+# rewrite itself; the rendered DOM and inline styles are kept.
+SCRIPT_TAG = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+
+
+def snapshot_dir_for(root, origin, destination, depart_date, return_date, country=None):
+    """Return the snapshot directory for one search from one country."""
+    name = f"{origin}_to_{destination}_{depart_date.replace('-', '')}_{return_date.replace('-', '')}"
+    if country:
+        name += f"_{country}"
+    return os.path.join(root, name)
+
+
+def save_snapshot(driver, snapshot_dir, stage):
+    """Save the current page HTML and a screenshot for stage."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    html_file = os.path.join(snapshot_dir, f"{stage}.html")
+    with open(html_file, "w", encoding="utf-8") as f:
+        f.write(SCRIPT_TAG.sub("", driver.page_source))
+    driver.save_screenshot(os.path.join(snapshot_dir, f"{stage}.png"))
+
+    manifest_file = os.path.join(snapshot_dir, MANIFEST_FILE)
+    manifest = load_manifest(snapshot_dir)
+    manifest[stage] = {'url': driver.current_url, 'html': f"{stage}.html", 'screenshot': f"{stage}.png"}
+    with open(manifest_file, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Saved {stage} snapshot to {html_file}")
+
+
+def load_manifest(snapshot_dir):
+    """Return the {stage: info} manifest of a snapshot directory."""
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """Serve a snapshot directory over HTTP on localhost.
+
+    Use as a context manager; url_for() turns a path relative to the
+    directory into a URL the browser can load.
+    """
+
+    def __init__(self, directory, host="127.0.0.1", port=0):
+        handler = partial(_QuietHandler, directory=os.path.abspath(directory))
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url_for(self, path):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/{path.replace(os.sep, '/')}"
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Block images, fonts, analytics and ads while scraping, and measure what that saves."""
+import threading
+
+from cache_files import cache_path, load_json, save_json
+from readiness import drain_network_events
+
+
+STATS_FILE = cache_path("resource_stats.json")
+
+# Network.setBlockedURLs patterns ("*" is a wildcard)
+BLOCKED_URL_PATTERNS = [
+    # Images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.googleusercontent.com/*", "*maps.googleapis.com/*",
+    # Fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.gstatic.com/*", "*fonts.googleapis.com/*",
+    # Analytics and ads
+    "*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*",
+    "*googlesyndication.com/*", "*googleadservices.com/*", "*play.google.com/log*", "*/gen_204*",
+]
+
+# Waits that make up the page load being compared
+LOAD_STEPS = ('page_load', 'main_content', 'results_rendered')
+
+
+def set_resource_blocking(driver, enabled):
+    """Turn URL blocking on or off for a driver; pooled drivers keep whatever was set last."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS if enabled else []})
+    driver.resources_blocked = enabled
+
+
+def page_traffic(driver):
+    """Return (bytes received, requests blocked) for the current page from the network events."""
+    drain_network_events(driver)
+    received = blocked = 0
+    for event in getattr(driver, 'network_events', []):
+        params = event['params']
+        if event['method'] == 'Network.loadingFinished':
+            received += int(params.get('encodedDataLength') or 0)
+        elif event['method'] == 'Network.loadingFailed' and params.get('blockedReason'):
+            blocked += 1
+    return received, blocked
+
+
+def page_load_seconds(driver):
+    """Return the time spent waiting for the page and its results to load."""
+    return sum(elapsed for step, elapsed, _ in getattr(driver, 'wait_timings', []) if step in LOAD_STEPS)
+
+
+class ResourceStats:
+    """Per-country page weight and load time, with and without blocking, kept across runs.
+
+    The saving reported for a country is the difference between its mean
+    unblocked and mean blocked page, so it appears once both are known.
+    """
+
+    def __init__(self, path=STATS_FILE):
+        self.path = path
+        self.stats = load_json(path)
+        self.lock = threading.Lock()
+
+    def record(self, country, blocked, received, seconds):
+        """Add one page load to a country's running totals."""
+        mode = 'blocked' if blocked else 'full'
+        with self.lock:
+            totals = self.stats.setdefault(country or 'default', {}).setdefault(
+                mode, {'pages': 0, 'bytes': 0, 'seconds': 0.0})
+            totals['pages'] += 1
+            totals['bytes'] += received
+            totals['seconds'] += seconds
+
+    def saving(self, country):
+        """Return (bytes, seconds) saved per page by blocking for a country, or None."""
+        with self.lock:
+            country_stats = self.stats.get(country or 'default', {})
+            full, blocked = country_stats.get('full'), country_stats.get('blocked')
+        if not full or not blocked:
+            return None
+        return (full['bytes'] / full['pages'] - blocked['bytes'] / blocked['pages'],
+                full['seconds'] / full['pages'] - blocked['seconds'] / blocked['pages'])
+
+    def measure(self, driver, country):
+        """Record the current page's traffic and print it, with the saving when known."""
+        received, blocked_requests = page_traffic(driver)
+        seconds = page_load_seconds(driver)
+        blocked = getattr(driver, 'resources_blocked', False)
+        self.record(country, blocked, received, seconds)
+
+        message = f"Page weight for {country}: {received / 1024:.0f} KB in {seconds:.1f}s"
+        if blocked:
+            message += f", {blocked_requests} requests blocked"
+        saving = self.saving(country)
+        if saving:
+            message += f" (blocking saves {saving[0] / 1024:.0f} KB and {saving[1]:.1f}s per page)"
+        print(message)
+
+    def save(self):
+        with self.lock:
+            save_json(self.path, self.stats)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Append-only journal of a run's job outcomes, so a crashed run can be resumed.
+
+Each run writes one JSON line per event to .cache/runs/<run_id>.jsonl:
+
+    {"event": "start", "searches": [...], "countries": [...], "at": ...}
+    {"event": "job", "country": ..., "search": [...], "status": "ok", "records": [...], "csv": ...,
+     "screenshot": ..., "at": ...}
+    {"event": "job", "country": ..., "search": [...], "status": "failed", "at": ...}
+    {"event": "end", "at": ...}
+
+A resumed run appends to the same journal. Its finished jobs are those
+whose latest entry is "ok"; everything else is scraped again.
+"""
+import os
+import json
+import time
+import threading
+
+from cache_files import cache_path
+from records import FlightRecord
+from search_matrix import Search, Job
+
+
+JOURNAL_DIR = cache_path("runs")
+
+
+class RunJournal:
+    """One run's journal file, written a line at a time as jobs finish."""
+
+    def __init__(self, path, searches, countries, entries=()):
+        self.path = path
+        self.run_id = os.path.splitext(os.path.basename(path))[0]
+        self.searches = searches
+        self.countries = countries
+        self.entries = list(entries)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def start(cls, searches, countries, journal_dir=JOURNAL_DIR):
+        """Begin a new run's journal."""
+        os.makedirs(journal_dir, exist_ok=True)
+        run_id = time.strftime("%Y%m%d_%H%M%S")
+        journal = cls(os.path.join(journal_dir, f"{run_id}.jsonl"), list(searches), list(countries))
+        journal.write({'event': 'start', 'searches': [list(search) for search in searches],
+                       'countries': list(countries)})
+        print(f"Run journal: {journal.path}")
+        return journal
+
+    @classmethod
+    def resume(cls, run_id='latest', journal_dir=JOURNAL_DIR):
+        """Reopen a run's journal; run_id 'latest' picks the newest one. Returns None if there is none."""
+        if run_id == 'latest':
+            names = sorted(name for name in os.listdir(journal_dir) if name.endswith(".jsonl")) \
+                if os.path.isdir(journal_dir) else []
+            if not names:
+                return None
+            run_id = os.path.splitext(names[-1])[0]
+        path = os.path.join(journal_dir, f"{run_id}.jsonl")
+        if not os.path.exists(path):
+            return None
+
+        entries = []
+        with open(path) as f:
+            text = f.read()
+        for line in text.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # a line cut short by the crash
+        if text and not text.endswith("\n"):
+            with open(path, "a") as f:
+                f.write("\n")
+        start = next((entry for entry in entries if entry.get('event') == 'start'), None)
+        if start is None:
+            return None
+        searches = [Search(*search) for search in start['searches']]
+        journal = cls(path, searches, start['countries'], entries)
+        print(f"Resuming run {journal.run_id}: {len(journal.finished())} of "
+              f"{len(searches) * len(start['countries'])} searches already done")
+        return journal
+
+    def write(self, entry):
+        """Append one event and flush it to disk straight away."""
+        entry['at'] = time.time()
+        with self.lock:
+            self.entries.append(entry)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record(self, job, records=None, csv_path=None, screenshot=None):
+        """Record one (country, search) outcome; no records means it failed.
+
+        screenshot is the path of the screenshot kept for the search, or None.
+        """
+        entry = {'event': 'job', 'country': job.country, 'search': list(job.search),
+                 'status': 'ok' if records else 'failed'}
+        if records:
+            entry['records'] = [list(record) for record in records]
+            entry['csv'] = csv_path
+            entry['screenshot'] = screenshot
+        self.write(entry)
+
+    def finish(self):
+        self.write({'event': 'end'})
+
+    def finished(self):
+        """Return {Job: [FlightRecord, ...]} for jobs whose latest outcome is ok."""
+        latest = {}
+        with self.lock:
+            for entry in self.entries:
+                if entry.get('event') == 'job':
+                    latest[Job(entry['country'], Search(*entry['search']))] = entry
+        return {job: [FlightRecord(*record) for record in entry['records']]
+                for job, entry in latest.items() if entry['status'] == 'ok'}
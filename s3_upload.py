@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Concurrent S3 uploads that skip objects already stored unchanged."""
+import os
+import time
+import queue
+import hashlib
+import threading
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+DEFAULT_BUCKET = 'flightscreenshots'
+UPLOAD_DIRECTORIES = ['screenshots', 'prices']
+DEFAULT_WORKERS = 8
+
+# Files kept in the repo to create the output directories
+IGNORED_FILES = {'placeholder'}
+
+# The price history database (prices/history.sqlite) and its WAL files are
+# local state that is written while a run is open, so they are never uploaded
+IGNORED_SUFFIXES = ('.sqlite', '.sqlite-wal', '.sqlite-shm')
+
+# Object metadata key holding the SHA-256 of the uploaded file. Needed
+# because multipart uploads get an ETag that is not the file's MD5.
+HASH_METADATA_KEY = 'sha256'
+
+MB = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MB,
+    multipart_chunksize=8 * MB,
+    max_concurrency=4,
+    use_threads=True,
+)
+
+
+def make_s3_client(max_workers=DEFAULT_WORKERS):
+    """Create one S3 client to share across upload threads.
+
+    S3_ENDPOINT_URL points the client at a local stand-in such as MinIO.
+    """
+    pool_size = max_workers * TRANSFER_CONFIG.max_request_concurrency
+    return boto3.client(
+        's3',
+        endpoint_url=os.environ.get('S3_ENDPOINT_URL'),
+        config=Config(max_pool_connections=pool_size, retries={'max_attempts': 5, 'mode': 'adaptive'}),
+    )
+
+
+def file_digests(path):
+    """Return the (md5, sha256) hex digests of a file, reading it once."""
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(MB), b''):
+            md5.update(chunk)
+            sha256.update(chunk)
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+def is_unchanged(s3, bucket, key, md5, sha256):
+    """Check whether the object at key already holds this content.
+
+    Any error counts as changed, so the file is uploaded: S3 answers
+    HeadObject with 403 when the caller may only PutObject.
+    """
+    try:
+        head = s3.head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code')
+        if code not in ('404', 'NoSuchKey', 'NotFound'):
+            print(f"Could not check s3://{bucket}/{key} ({code}), uploading it")
+        return False
+
+    if head.get('Metadata', {}).get(HASH_METADATA_KEY) == sha256:
+        return True
+
+    # Objects uploaded in one part have the MD5 as their ETag
+    etag = head.get('ETag', '').strip('"')
+    return '-' not in etag and etag == md5
+
+
+def upload_file(s3, bucket, path, key):
+    """Upload one file unless S3 already has it; returns 'uploaded' or 'skipped'."""
+    md5, sha256 = file_digests(path)
+    if is_unchanged(s3, bucket, key, md5, sha256):
+        return 'skipped'
+
+    s3.upload_file(path, bucket, key, ExtraArgs={'Metadata': {HASH_METADATA_KEY: sha256}}, Config=TRANSFER_CONFIG)
+    return 'uploaded'
+
+
+def iter_upload_files(directories):
+    """Yield (path, key) for every file to upload from the given directories."""
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for file in sorted(os.listdir(directory)):
+            path = os.path.join(directory, file)
+            if file in IGNORED_FILES or file.endswith(IGNORED_SUFFIXES) or not os.path.isfile(path):
+                continue
+            yield path, f"{directory}/{file}"
+
+
+def upload_directories(bucket=DEFAULT_BUCKET, directories=UPLOAD_DIRECTORIES, max_workers=DEFAULT_WORKERS,
+                       client=None):
+    """Upload every file in directories to bucket with a thread pool.
+
+    Returns a dict counting uploaded, skipped and failed files.
+    """
+    s3 = client or make_s3_client(max_workers)
+    counts = {'uploaded': 0, 'skipped': 0, 'failed': 0}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(upload_file, s3, bucket, path, key): key
+            for path, key in iter_upload_files(directories)
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                result = future.result()
+                counts[result] += 1
+                if result == 'uploaded':
+                    print(f"Uploaded {key}")
+            except Exception as e:
+                counts['failed'] += 1
+                print(f"Failed to upload {key}: {e}")
+
+    print(f"S3 upload: {counts['uploaded']} uploaded, {counts['skipped']} unchanged, {counts['failed']} failed")
+    return counts
+
+
+class UploadQueue:
+    """Uploads files in background threads while the scraper moves on.
+
+    enqueue() blocks once max_size files are waiting, so a slow link
+    applies back-pressure instead of growing memory. Failed uploads are
+    retried with exponential backoff. close() drains the queue and stops
+    the workers; call it on shutdown, including after a crash.
+    """
+
+    def __init__(self, bucket=DEFAULT_BUCKET, max_size=64, workers=2, retries=3, backoff=1.0, client=None):
+        self.bucket = bucket
+        self.retries = retries
+        self.backoff = backoff
+        self.s3 = client or make_s3_client(workers)
+        self.queue = queue.Queue(maxsize=max_size)
+        self.counts = {'uploaded': 0, 'skipped': 0, 'failed': 0}
+        self.lock = threading.Lock()
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def enqueue(self, path, key=None):
+        """Queue a local file for upload; key defaults to its relative path."""
+        if not os.path.isfile(path):
+            return
+        if key is None:
+            key = os.path.relpath(path).replace(os.sep, '/')
+        self.queue.put((path, key))
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self._upload_with_retry(*item)
+            finally:
+                self.queue.task_done()
+
+    def _upload_with_retry(self, path, key):
+        for attempt in range(self.retries + 1):
+            try:
+                result = upload_file(self.s3, self.bucket, path, key)
+                if result == 'uploaded':
+                    print(f"Uploaded {key}")
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    result = 'failed'
+                    print(f"Failed to upload {key} after {attempt + 1} attempts: {e}")
+                else:
+                    time.sleep(self.backoff * 2 ** attempt)
+
+        with self.lock:
+            self.counts[result] += 1
+
+    def close(self):
+        """Wait for every queued upload to finish, then stop the workers."""
+        self.queue.join()
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+
+        print(f"S3 upload queue drained: {self.counts['uploaded']} uploaded, "
+              f"{self.counts['skipped']} unchanged, {self.counts['failed']} failed")
+        return self.counts
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Order (country, search) jobs so VPN reconnects are as few and as useful as possible."""
+import time
+from collections import namedtuple
+
+
+Batch = namedtuple('Batch', ['country', 'searches', 'score'])
+Plan = namedtuple('Plan', ['batches', 'deferred', 'reconnects'])
+
+# A search scraped this many hours ago counts as fully stale
+DEFAULT_STALE_AFTER_HOURS = 24
+
+
+def staleness(last_scraped, now, stale_after_hours=DEFAULT_STALE_AFTER_HOURS):
+    """Score from 0 (just scraped) to 1 (never scraped or older than stale_after_hours)."""
+    if last_scraped is None:
+        return 1.0
+    age_hours = max(0.0, now - last_scraped) / 3600
+    return min(1.0, age_hours / stale_after_hours)
+
+
+def plan_batches(groups, current_country=None, reconnect_budget=None, last_scraped=None, priorities=None,
+                 stale_after_hours=DEFAULT_STALE_AFTER_HOURS, now=None, country_weights=None):
+    """Turn {country: [search, ...]} into an ordered Plan.
+
+    Every country becomes one batch, so each is connected at most once.
+    A batch's score is the sum over its searches of priority x staleness;
+    batches run highest score first, except that the country the VPN is
+    already connected to goes first because it costs no reconnect. With a
+    reconnect_budget, batches needing more switches than that are deferred.
+
+    last_scraped maps (country, search) to a Unix timestamp and priorities
+    maps search to a weight (default 1.0). country_weights maps country to
+    a multiplier (default 1.0), e.g. its VPN connect success rate. Searches
+    within a batch are ordered by the same score.
+    """
+    last_scraped = last_scraped or {}
+    priorities = priorities or {}
+    country_weights = country_weights or {}
+    now = now or time.time()
+
+    def job_score(country, search):
+        return (priorities.get(search, 1.0) * country_weights.get(country, 1.0)
+                * staleness(last_scraped.get((country, search)), now, stale_after_hours))
+
+    batches = []
+    for country, searches in groups.items():
+        scored = sorted(searches, key=lambda search: job_score(country, search), reverse=True)
+        batches.append(Batch(country, scored, sum(job_score(country, search) for search in searches)))
+
+    # Stable sort: equal scores keep the configured country order
+    batches.sort(key=lambda batch: (batch.country != current_country, -batch.score))
+
+    planned, deferred, reconnects = [], [], 0
+    for batch in batches:
+        cost = 0 if batch.country == current_country else 1
+        if reconnect_budget is not None and reconnects + cost > reconnect_budget:
+            deferred.append(batch)
+            continue
+        planned.append(batch)
+        reconnects += cost
+
+    return Plan(planned, deferred, reconnects)
+
+
+def print_plan(plan):
+    """Print the batch order, reconnect count and anything deferred."""
+    jobs = sum(len(batch.searches) for batch in plan.batches)
+    print(f"Scrape plan: {jobs} searches in {len(plan.batches)} country batches, {plan.reconnects} VPN reconnects")
+    for i, batch in enumerate(plan.batches, 1):
+        print(f"  {i:>3}. {batch.country:<28} {len(batch.searches):>3} searches  score {batch.score:.2f}")
+    if plan.deferred:
+        deferred_jobs = sum(len(batch.searches) for batch in plan.deferred)
+        print(f"  Deferred by reconnect budget: {deferred_jobs} searches in "
+              f"{[batch.country for batch in plan.deferred]}")
+
+
+class SwitchStats:
+    """Measured cost of VPN switches during a run."""
+
+    def __init__(self):
+        self.switches = []
+
+    def record(self, country, seconds, ok):
+        self.switches.append((country, seconds, ok))
+
+    def total(self):
+        return sum(seconds for _, seconds, _ in self.switches)
+
+    def report(self, scrape_seconds=None):
+        """Print switch count, total and mean overhead, and its share of the run."""
+        if not self.switches:
+            return
+        failed = sum(1 for _, _, ok in self.switches if not ok)
+        total = self.total()
+        print(f"VPN switches: {len(self.switches)} ({failed} failed), {total:.1f}s total, "
+              f"{total / len(self.switches):.1f}s mean")
+        if scrape_seconds:
+            print(f"VPN switch overhead: {total / (total + scrape_seconds):.0%} of connect + scrape time")
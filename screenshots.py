@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Screenshot capture through CDP with compact encoding off the browser thread."""
+import os
+import base64
+import threading
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+
+SCREENSHOT_FORMATS = ['png', 'webp']
+
+# Element that holds the flight results
+RESULTS_SELECTOR = "div[role='main']"
+
+ELEMENT_RECT_JS = """
+const element = document.querySelector(arguments[0]);
+if (!element) return null;
+const rect = element.getBoundingClientRect();
+return {x: rect.left + window.scrollX, y: rect.top + window.scrollY, width: rect.width, height: rect.height};
+"""
+
+
+def capture_png(driver, clip_selector=None):
+    """Return PNG bytes of the page, optionally clipped to the element matching clip_selector."""
+    params = {'format': 'png'}
+    if clip_selector:
+        rect = driver.execute_script(ELEMENT_RECT_JS, clip_selector)
+        if rect and rect['width'] > 0 and rect['height'] > 0:
+            params['clip'] = dict(rect, scale=1)
+            params['captureBeyondViewport'] = True
+        else:
+            print(f"Screenshot clip element {clip_selector} not found, capturing full page")
+
+    result = driver.execute_cdp_cmd('Page.captureScreenshot', params)
+    return base64.b64decode(result['data'])
+
+
+def encode_image(png_bytes, fmt):
+    """Losslessly re-encode PNG bytes as optimised PNG or WebP."""
+    image = Image.open(BytesIO(png_bytes))
+    output = BytesIO()
+    if fmt == 'webp':
+        image.save(output, 'WEBP', lossless=True, quality=100, method=6)
+    else:
+        image.save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+
+class ScreenshotWriter:
+    """Captures screenshots and encodes them on a worker thread.
+
+    save() only holds the browser for the CDP capture; encoding and the
+    disk write happen in the background. on_saved(path) is called for
+    every file written, e.g. to queue it for upload. close() waits for
+    pending writes and reports the bytes saved against Chrome's PNG.
+    """
+
+    def __init__(self, fmt='png', clip_selector=None, workers=1, on_saved=None):
+        if fmt not in SCREENSHOT_FORMATS:
+            raise ValueError(f"Unsupported screenshot format: {fmt}")
+        self.fmt = fmt
+        self.clip_selector = clip_selector
+        self.on_saved = on_saved
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.count = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+
+    def path_for(self, path):
+        """Return path with the extension of the configured format."""
+        return f"{os.path.splitext(path)[0]}.{self.fmt}"
+
+    def save(self, driver, path):
+        """Capture the page now and write it to path in the background; returns a Future of the final path."""
+        png_bytes = capture_png(driver, self.clip_selector)
+        return self.executor.submit(self._write, png_bytes, self.path_for(path))
+
+    def _write(self, png_bytes, path):
+        try:
+            encoded = encode_image(png_bytes, self.fmt)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(encoded)
+        except Exception as e:
+            print(f"Error writing screenshot {path}: {e}")
+            raise
+
+        with self.lock:
+            self.count += 1
+            self.raw_bytes += len(png_bytes)
+            self.written_bytes += len(encoded)
+        print(f"Screenshot saved to {path} ({len(encoded) / 1024:.0f} KB, was {len(png_bytes) / 1024:.0f} KB)")
+
+        if self.on_saved:
+            self.on_saved(path)
+        return path
+
+    def close(self):
+        """Wait for pending screenshots and print the bytes saved this run."""
+        self.executor.shutdown(wait=True)
+        if self.count:
+            saved = self.raw_bytes - self.written_bytes
+            print(f"Screenshots: {self.count} written, {self.written_bytes / 1024:.0f} KB total, "
+                  f"{saved / 1024:.0f} KB saved ({saved / self.raw_bytes:.0%}) vs. Chrome PNG")
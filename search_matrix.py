@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Expand routes x date pairs x countries from a config file into scrape jobs."""
+import json
+from collections import namedtuple, OrderedDict
+from datetime import date, timedelta
+
+
+Search = namedtuple('Search', ['origin', 'destination', 'depart_date', 'return_date'])
+Job = namedtuple('Job', ['country', 'search'])
+
+# The search main() ran before search configs existed
+DEFAULT_CONFIG = {
+    'routes': [{'origin': 'Copenhagen', 'destination': 'Antalya'}],
+    'dates': [{'depart': '2025-10-17', 'return': '2025-10-24'}],
+    'countries': 'all',
+}
+
+
+def load_config(path):
+    """Load a search matrix config from a JSON file.
+
+    {
+      "routes": [{"origin": "Copenhagen", "destination": "Antalya"}],
+      "dates": [
+        {"depart": "2025-10-17", "return": "2025-10-24"},
+        {"rolling": {"start_in_days": 14, "count": 4, "step_days": 7, "stay_days": 7}}
+      ],
+      "countries": ["Germany", "Italy"]
+    }
+
+    A route may carry its own "dates" list, which replaces the top-level
+    one for that route, and a "priority" weight used by the scheduler.
+    "countries" may be "all" (or left out) to use every available NordVPN
+    country.
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    if not config.get('routes'):
+        raise ValueError(f"{path}: 'routes' must list at least one route")
+    for route in config['routes']:
+        if not route.get('origin') or not route.get('destination'):
+            raise ValueError(f"{path}: every route needs an origin and a destination")
+        if not route.get('dates', config.get('dates')):
+            raise ValueError(f"{path}: no dates for route {route['origin']} to {route['destination']}")
+    return config
+
+
+def expand_dates(spec, today=None):
+    """Turn one dates entry into a list of (depart_date, return_date) ISO string pairs."""
+    if 'rolling' not in spec:
+        return [(spec['depart'], spec['return'])]
+
+    rolling = spec['rolling']
+    today = today or date.today()
+    first = today + timedelta(days=rolling.get('start_in_days', 0))
+    pairs = []
+    for i in range(rolling.get('count', 1)):
+        depart = first + timedelta(days=i * rolling.get('step_days', 7))
+        pairs.append((depart.isoformat(), (depart + timedelta(days=rolling['stay_days'])).isoformat()))
+    return pairs
+
+
+def expand_searches(config, today=None):
+    """Return every Search in the config, without duplicates, in config order."""
+    searches = []
+    for route in config['routes']:
+        for spec in route.get('dates', config.get('dates')):
+            for depart_date, return_date in expand_dates(spec, today):
+                search = Search(route['origin'], route['destination'], depart_date, return_date)
+                if search not in searches:
+                    searches.append(search)
+    return searches
+
+
+def search_priorities(config, today=None):
+    """Return {search: priority} from each route's optional "priority" (default 1.0)."""
+    priorities = {}
+    for route in config['routes']:
+        for spec in route.get('dates', config.get('dates')):
+            for depart_date, return_date in expand_dates(spec, today):
+                search = Search(route['origin'], route['destination'], depart_date, return_date)
+                priorities[search] = max(priorities.get(search, 0.0), float(route.get('priority', 1.0)))
+    return priorities
+
+
+def config_countries(config):
+    """Return the configured country list, or None if every available country should be used."""
+    countries = config.get('countries', 'all')
+    return None if countries == 'all' else list(countries)
+
+
+def expand_jobs(searches, countries):
+    """Return one Job per (country, search), grouped so each country's searches are adjacent."""
+    return [Job(country, search) for country in countries for search in searches]
+
+
+def group_jobs_by_country(jobs):
+    """Group jobs into an ordered {country: [search, ...]} mapping."""
+    groups = OrderedDict()
+    for job in jobs:
+        groups.setdefault(job.country, []).append(job.search)
+    return groups
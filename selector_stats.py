@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Learn which selector in a fallback chain works, so later runs try it first.
+
+Stats are kept per selector group (e.g. "stops_button") and per context,
+a "locale/country" string, because Google Flights' markup and labels vary
+with both. The driver carries the stats object and its context as the
+selector_stats and selector_context attributes; drivers without them try
+selectors in their configured order.
+"""
+import threading
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
+
+from cache_files import cache_path, load_json, save_json
+
+
+STATS_FILE = cache_path("selector_stats.json")
+
+
+class SelectorStats:
+    """Per group and context: the last winning selector and each selector's hits and misses."""
+
+    def __init__(self, path=STATS_FILE):
+        self.path = path
+        self.stats = load_json(path)
+        self.queries = {}
+        self.first_try_hits = {}
+        self.lookups = {}
+        self.lock = threading.Lock()
+
+    def order(self, group, context, selectors):
+        """Return selectors with the last winner first and the rest by hit rate, ties in config order."""
+        with self.lock:
+            entry = self.stats.get(group, {}).get(context, {})
+            counts = dict(entry.get('selectors', {}))
+            last = entry.get('last')
+
+        def rank(item):
+            index, selector = item
+            hits, misses = counts.get(selector, (0, 0))
+            # Laplace-smoothed rate, so an untried selector sits between winners and losers
+            return (selector != last, -(hits + 1) / (hits + misses + 2), index)
+
+        return [selector for _, selector in sorted(enumerate(selectors), key=rank)]
+
+    def record(self, group, context, selector, hit, first_try=False):
+        """Count one DOM query for a selector; a hit also makes it the group's last winner."""
+        with self.lock:
+            entry = self.stats.setdefault(group, {}).setdefault(context, {'last': None, 'selectors': {}})
+            hits, misses = entry['selectors'].get(selector, (0, 0))
+            entry['selectors'][selector] = (hits + 1, misses) if hit else (hits, misses + 1)
+            if hit:
+                entry['last'] = selector
+                self.lookups[group] = self.lookups.get(group, 0) + 1
+                if first_try:
+                    self.first_try_hits[group] = self.first_try_hits.get(group, 0) + 1
+            self.queries[group] = self.queries.get(group, 0) + 1
+
+    def report(self):
+        """Print, per group, how often the first selector tried was the one that matched."""
+        with self.lock:
+            groups = sorted(self.queries)
+            if not groups:
+                return
+            print("Selector cache:")
+            for group in groups:
+                found = self.lookups.get(group, 0)
+                first = self.first_try_hits.get(group, 0)
+                rate = f"{first / found:.0%}" if found else "-"
+                print(f"  {group:<18} {found:>4} found, first try hit {rate:>4}, {self.queries[group]} DOM queries")
+
+    def save(self):
+        with self.lock:
+            save_json(self.path, self.stats)
+
+
+def ordered_selectors(driver, group, selectors):
+    """Return selectors in the order the driver's stats suggest (config order without stats)."""
+    stats = getattr(driver, 'selector_stats', None)
+    if stats is None:
+        return list(selectors)
+    return stats.order(group, getattr(driver, 'selector_context', 'default'), selectors)
+
+
+def record_selector(driver, group, selector, hit, first_try=False):
+    """Record a selector attempt against the driver's stats, if it has any."""
+    stats = getattr(driver, 'selector_stats', None)
+    if stats is not None:
+        stats.record(group, getattr(driver, 'selector_context', 'default'), selector, hit, first_try)
+
+
+def find_first(driver, group, selectors, visible=False):
+    """Try XPath selectors in learned order; return (selector, elements) for the first match.
+
+    With visible set, a match also needs its first element to be displayed.
+    Returns (None, []) if nothing matched.
+    """
+    for attempt, selector in enumerate(ordered_selectors(driver, group, selectors)):
+        try:
+            elements = driver.find_elements(By.XPATH, selector)
+            found = bool(elements) and (not visible or elements[0].is_displayed())
+        except WebDriverException:
+            elements, found = [], False
+        record_selector(driver, group, selector, found, first_try=attempt == 0)
+        if found:
+            return selector, elements
+    return None, []
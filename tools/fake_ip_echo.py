@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Local stand-in for an IP echo service that follows the fake nordvpn CLI's state.
+
+    python tools/fake_ip_echo.py &
+    export EGRESS_ECHO_URL=http://127.0.0.1:8765/
+
+Answers every GET like ip-api.com (country name and ISO code), with the
+country fake_nordvpn.py is connected to (read from FAKE_NORDVPN_STATE) or
+the home country when it is disconnected. Country names are the geo
+provider's, which differ from NordVPN's for some countries:
+
+    FAKE_ECHO_PORT      port to listen on (default: 8765)
+    FAKE_HOME_COUNTRY   country reported without a tunnel (default: Denmark)
+    FAKE_ECHO_FAIL      answer every request with HTTP 429, like a rate-limited ip-api.com
+    FAKE_EGRESS_LEAK    comma-separated countries whose tunnel leaks the home IP
+"""
+import os
+import sys
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from egress import country_code
+
+
+HOME_IP = "192.0.2.1"
+# Where ip-api.com's name differs from `nordvpn countries`
+GEO_NAMES = {'Bosnia_And_Herzegovina': "Bosnia and Herzegovina", 'Czech_Republic': "Czechia"}
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if os.environ.get("FAKE_ECHO_FAIL"):
+            self.send_response(429)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        try:
+            with open(os.environ.get("FAKE_NORDVPN_STATE", "/tmp/fake_nordvpn.json")) as f:
+                country = json.load(f).get('country')
+        except (OSError, ValueError):
+            country = None
+        leaking = set(filter(None, os.environ.get("FAKE_EGRESS_LEAK", "").split(",")))
+
+        if not country or country in leaking:
+            country, ip = os.environ.get("FAKE_HOME_COUNTRY", "Denmark"), HOME_IP
+        else:
+            ip = f"198.51.100.{len(country)}"
+        answer = {'status': 'success', 'country': GEO_NAMES.get(country, country.replace("_", " ")),
+                  'countryCode': country_code(country), 'query': ip}
+
+        body = json.dumps(answer).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    port = int(os.environ.get("FAKE_ECHO_PORT", "8765"))
+    print(f"Fake IP echo listening on http://127.0.0.1:{port}/")
+    HTTPServer(("127.0.0.1", port), EchoHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Scripted stand-in for the nordvpn CLI, for running the scraper without a VPN.
+
+    export NORDVPN_BIN="$PWD/tools/fake_nordvpn.py"
+    python copenhagen_antalya_scraper.py --plan-only
+
+Supports countries, cities, groups, connect (with an optional city and
+--group), disconnect and status. State is kept in
+FAKE_NORDVPN_STATE (default: /tmp/fake_nordvpn.json). Behaviour is
+scripted through environment variables:
+
+    FAKE_NORDVPN_COUNTRIES      comma-separated country list
+    FAKE_NORDVPN_CONNECT_DELAY  seconds a connect takes (default: 0)
+    FAKE_NORDVPN_SETTLE_DELAY   seconds status keeps saying "Connecting" after
+                                connect returns (default: 0)
+    FAKE_NORDVPN_FAIL           comma-separated countries whose connect fails
+"""
+import os
+import sys
+import json
+import time
+
+
+DEFAULT_COUNTRIES = "Albania,Bosnia_And_Herzegovina,Czech_Republic,Germany,Italy,Netherlands,Sweden,United_Kingdom,United_States"
+CITIES = {
+    'Germany': ["Berlin", "Frankfurt"],
+    'United_States': ["New_York", "Los_Angeles"],
+}
+GROUPS = ["Double_VPN", "Onion_Over_VPN", "P2P", "Standard_VPN_Servers"]
+
+
+def display_name(name):
+    """Spell a listed name the way status and connect print it: Bosnia and Herzegovina."""
+    return name.replace("_", " ").replace(" And ", " and ")
+
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'country': None}
+
+
+def save_state(path, state):
+    with open(path, "w") as f:
+        json.dump(state, f)
+
+
+def main():
+    state_file = os.environ.get("FAKE_NORDVPN_STATE", "/tmp/fake_nordvpn.json")
+    countries = os.environ.get("FAKE_NORDVPN_COUNTRIES", DEFAULT_COUNTRIES).split(",")
+    failing = set(filter(None, os.environ.get("FAKE_NORDVPN_FAIL", "").split(",")))
+    state = load_state(state_file)
+    command = sys.argv[1:] or ["status"]
+
+    if command[0] == "countries":
+        print(", ".join(countries))
+
+    elif command[0] == "cities":
+        print(", ".join(CITIES.get(command[1] if len(command) > 1 else "", [])))
+
+    elif command[0] == "groups":
+        print(", ".join(GROUPS))
+
+    elif command[0] == "connect":
+        args = command[1:]
+        if args[:1] == ["--group"]:
+            args = args[2:]
+        target = args[0] if args else countries[0]
+        city = args[1] if len(args) > 1 else None
+        time.sleep(float(os.environ.get("FAKE_NORDVPN_CONNECT_DELAY", "0")))
+        if (target not in countries or target in failing
+                or (city and city not in CITIES.get(target, []))):
+            print(f"Whoops! Connection failed. Please try again.", file=sys.stderr)
+            return 1
+        state['country'] = target
+        state['city'] = city or (CITIES.get(target) or [target])[0]
+        state['connected_at'] = time.time() + float(os.environ.get("FAKE_NORDVPN_SETTLE_DELAY", "0"))
+        save_state(state_file, state)
+        print(f"Connecting to {display_name(target)} #1234 (fake{len(target)}.nordvpn.com)")
+        print(f"You are connected to {display_name(target)} #1234 (fake{len(target)}.nordvpn.com)!")
+
+    elif command[0] == "disconnect":
+        if state.get('country'):
+            print("You are disconnected from NordVPN.")
+        else:
+            print("You are not connected to NordVPN.")
+        state['country'] = None
+        save_state(state_file, state)
+
+    elif command[0] == "status":
+        if state.get('country') and time.time() < state.get('connected_at', 0):
+            print("Status: Connecting")
+        elif state.get('country'):
+            country = display_name(state['country'])
+            print("Status: Connected")
+            print(f"Hostname: fake{len(state['country'])}.nordvpn.com")
+            print(f"Country: {country}")
+            print(f"City: {display_name(state.get('city') or state['country'])}")
+            print("Current technology: NORDLYNX")
+        else:
+            print("Status: Disconnected")
+
+    else:
+        print(f"Command '{command[0]}' doesn't exist.", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Drive the nordvpn CLI with asyncio and poll its status instead of sleeping.
+
+    controller = VpnController()
+    controller.connect("Germany")      # returns as soon as the tunnel is up
+    controller.connect("Germany__Frankfurt")   # a city: Country__City
+    controller.disconnect()
+    controller.report()
+    controller.close()
+
+The CLI is run as an async subprocess, and `nordvpn status` is polled until
+it reports the expected state, so a switch takes as long as the tunnel
+needs rather than a fixed sleep. An optional egress check (a callable
+taking the country, returning True once traffic leaves from there, False
+when it leaves elsewhere and None when it cannot tell) runs once status
+confirms the country, retried with backoff at most EGRESS_ATTEMPTS times,
+before a connect counts as done. A connect whose egress could not be
+checked returns None rather than False. NORDVPN_BIN selects the CLI, e.g.
+tools/fake_nordvpn.py for testing.
+"""
+import os
+import re
+import time
+import asyncio
+import statistics
+
+from vpn_targets import split_target
+
+
+NORDVPN_BIN = os.environ.get("NORDVPN_BIN", "nordvpn")
+
+POLL_INTERVAL = 0.25
+CONNECT_TIMEOUT = 60
+DISCONNECT_TIMEOUT = 30
+STATUS_TIMEOUT = 10
+
+# Egress lookups per connect, the first retry after EGRESS_BACKOFF seconds, doubling;
+# kept low as echo services rate-limit (ip-api.com allows 45 a minute)
+EGRESS_ATTEMPTS = 3
+EGRESS_BACKOFF = 1
+
+
+def same_name(listed, shown):
+    """Compare a name as `nordvpn countries`/`cities` list it (Bosnia_And_Herzegovina)
+    with the way status shows it (Bosnia and Herzegovina)."""
+    return listed.replace("_", " ").casefold() == shown.replace("_", " ").casefold()
+
+
+def status_matches(target, status):
+    """Return whether a connected status is in a country or Country__City target."""
+    target_country, target_city = split_target(target)
+    if not same_name(target_country, status.get('Country', '')):
+        return False
+    return not target_city or same_name(target_city, status.get('City', ''))
+
+
+def parse_status(output):
+    """Parse `nordvpn status` output into a {key: value} dict."""
+    status = {}
+    for line in output.splitlines():
+        # The CLI may prefix output with spinner characters
+        match = re.match(r"^[\W_]*([A-Za-z][\w ]*?):\s*(.*)$", line.strip())
+        if match:
+            status[match.group(1)] = match.group(2).strip()
+    return status
+
+
+class VpnController:
+    """One nordvpn CLI session with switch latency metrics."""
+
+    def __init__(self, binary=None, poll_interval=POLL_INTERVAL, egress_check=None, group=None):
+        self.binary = binary or NORDVPN_BIN
+        self.group = group
+        self.poll_interval = poll_interval
+        self.egress_check = egress_check
+        self.switches = []
+        self.loop = asyncio.new_event_loop()
+
+    async def _run(self, *args, timeout=STATUS_TIMEOUT):
+        """Run the CLI; returns (returncode, stdout, stderr), or (None, '', reason) on timeout."""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.binary, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except OSError as e:
+            return None, "", str(e)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return None, "", f"timed out after {timeout:.0f}s"
+        return process.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+    async def status(self):
+        """Return the parsed `nordvpn status`, or {} if it could not be read."""
+        returncode, stdout, _ = await self._run("status")
+        return parse_status(stdout) if returncode == 0 else {}
+
+    async def connected_country_async(self, candidates=()):
+        status = await self.status()
+        if status.get('Status') != 'Connected' or not status.get('Country'):
+            return None
+        # A Country__City candidate for the connected city is more specific than its whole country
+        matches = [target for target in candidates if status_matches(target, status)]
+        return max(matches, key=lambda target: split_target(target)[1] is not None,
+                   default=status['Country'].replace(" ", "_"))
+
+    async def _poll(self, ready, deadline):
+        """Poll ready() until it is true or the deadline passes; returns (ok, polls)."""
+        polls = 0
+        while True:
+            polls += 1
+            if await ready():
+                return True, polls
+            if time.monotonic() >= deadline:
+                return False, polls
+            await asyncio.sleep(self.poll_interval)
+
+    async def _check_egress(self, country, deadline):
+        """Run the egress check until it passes, EGRESS_ATTEMPTS times or the deadline at most.
+
+        Returns True once it passes, False if any attempt saw the wrong
+        country or a leak, and None if no attempt could check at all.
+        """
+        delay = EGRESS_BACKOFF
+        mismatched = False
+        for attempt in range(1, EGRESS_ATTEMPTS + 1):
+            result = await self.loop.run_in_executor(None, self.egress_check, country)
+            if result:
+                return True
+            mismatched = mismatched or result is False
+            if attempt == EGRESS_ATTEMPTS or time.monotonic() + delay >= deadline:
+                break
+            await asyncio.sleep(delay)
+            delay *= 2
+        return False if mismatched else None
+
+    async def connect_async(self, country, timeout=CONNECT_TIMEOUT):
+        """Connect and wait until status (and the egress check, if any) confirms the country.
+
+        Returns True once confirmed, False if the connect failed or traffic
+        leaves from elsewhere, and None if the egress could not be checked.
+
+        country may be a Country__City target. With a server group set,
+        the connect asks for a server in that group.
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        target_country, target_city = split_target(country)
+        print(f"Connecting to NordVPN country: {country}")
+        args = ["connect"] + (["--group", self.group] if self.group else []) + [target_country]
+        if target_city:
+            args.append(target_city)
+        returncode, stdout, stderr = await self._run(*args, timeout=timeout)
+        if returncode != 0:
+            print(f"Failed to connect to {country}: {stderr.strip() or stdout.strip()}")
+            self.switches.append(('connect', country, time.monotonic() - start, False, 0))
+            return False
+
+        async def ready():
+            status = await self.status()
+            return status.get('Status') == 'Connected' and status_matches(country, status)
+
+        ok, polls = await self._poll(ready, deadline)
+        if ok and self.egress_check is not None:
+            ok = await self._check_egress(target_country, deadline)
+        elapsed = time.monotonic() - start
+        self.switches.append(('connect', country, elapsed, ok, polls))
+        if ok:
+            print(f"Connected to {country} in {elapsed:.1f}s ({polls} status polls)")
+        elif ok is None:
+            print(f"Connected to {country}, but its egress could not be verified")
+        else:
+            print(f"Connect to {country} not confirmed after {elapsed:.1f}s (limit {timeout:g}s)")
+        return ok
+
+    async def disconnect_async(self, timeout=DISCONNECT_TIMEOUT):
+        """Disconnect and wait until status no longer reports a connection."""
+        start = time.monotonic()
+        print("Disconnecting from NordVPN...")
+        returncode, _, stderr = await self._run("disconnect", timeout=timeout)
+        if returncode != 0:
+            print(f"Error disconnecting from NordVPN: {stderr.strip()}")
+            self.switches.append(('disconnect', None, time.monotonic() - start, False, 0))
+            return False
+
+        async def ready():
+            return (await self.status()).get('Status') != 'Connected'
+
+        ok, polls = await self._poll(ready, start + timeout)
+        self.switches.append(('disconnect', None, time.monotonic() - start, ok, polls))
+        if ok:
+            print(f"Disconnected from NordVPN in {time.monotonic() - start:.1f}s")
+        return ok
+
+    def connect(self, country, timeout=CONNECT_TIMEOUT):
+        return self.loop.run_until_complete(self.connect_async(country, timeout))
+
+    def disconnect(self, timeout=DISCONNECT_TIMEOUT):
+        return self.loop.run_until_complete(self.disconnect_async(timeout))
+
+    def connected_country(self, candidates=()):
+        """Return the country the VPN is connected to, or None.
+
+        The name is spelled as in candidates when one of them matches,
+        preferring a Country__City target for the connected city, otherwise
+        as status shows it with underscores for spaces.
+        """
+        return self.loop.run_until_complete(self.connected_country_async(candidates))
+
+    def report(self):
+        """Print connect and disconnect latency."""
+        for action in ('connect', 'disconnect'):
+            times = [seconds for kind, _, seconds, ok, _ in self.switches if kind == action and ok]
+            failed = sum(1 for kind, _, _, ok, _ in self.switches if kind == action and ok is False)
+            unverified = sum(1 for kind, _, _, ok, _ in self.switches if kind == action and ok is None)
+            if not times and not failed and not unverified:
+                continue
+            summary = (f"median {statistics.median(times):.1f}s, max {max(times):.1f}s"
+                       if times else "none succeeded")
+            print(f"VPN {action}: {len(times)} ok, {failed} failed"
+                  + (f", {unverified} unverified" if unverified else "") + f", {summary}")
+
+    def close(self):
+        self.loop.close()
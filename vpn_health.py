@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Per-country VPN connect history with a circuit breaker, kept across runs."""
+import time
+import threading
+
+from cache_files import cache_path, load_json, save_json
+
+
+HEALTH_FILE = cache_path("vpn_health.json")
+
+# Consecutive failed connects that open a country's circuit
+FAILURE_THRESHOLD = 2
+# An open circuit stays open this long, doubling with every further failure
+BASE_COOLDOWN = 3600
+MAX_COOLDOWN = 7 * 24 * 3600
+
+# Connect timeout: a multiple of the country's typical connect time, within bounds
+TIMEOUT_FACTOR = 3
+MIN_CONNECT_TIMEOUT = 15
+MAX_CONNECT_TIMEOUT = 60
+
+# Weight of the newest sample in the latency moving average
+LATENCY_SMOOTHING = 0.3
+
+
+class VpnHealth:
+    """Connect latency and success history per country.
+
+    A country's circuit opens after FAILURE_THRESHOLD consecutive failed
+    connects and stays open for a cooldown that doubles with each further
+    failure. Once the cooldown has passed one attempt is let through
+    (half-open); success closes the circuit, failure reopens it for longer.
+    """
+
+    def __init__(self, path=HEALTH_FILE):
+        self.path = path
+        self.countries = load_json(path)
+        self.lock = threading.Lock()
+
+    def _entry(self, country):
+        return self.countries.setdefault(country, {
+            'attempts': 0, 'failures': 0, 'consecutive_failures': 0,
+            'latency': None, 'open_until': 0,
+        })
+
+    def record(self, country, ok, seconds, now=None):
+        """Record one connect attempt and update the circuit."""
+        now = now or time.time()
+        with self.lock:
+            entry = self._entry(country)
+            entry['attempts'] += 1
+            if ok:
+                entry['consecutive_failures'] = 0
+                entry['open_until'] = 0
+                if entry['latency'] is None:
+                    entry['latency'] = seconds
+                else:
+                    entry['latency'] += LATENCY_SMOOTHING * (seconds - entry['latency'])
+                return
+
+            entry['failures'] += 1
+            entry['consecutive_failures'] += 1
+            excess = entry['consecutive_failures'] - FAILURE_THRESHOLD
+            if excess >= 0:
+                entry['open_until'] = now + min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** excess)
+
+    def is_open(self, country, now=None):
+        """True while a country's circuit is open and it should not be tried."""
+        with self.lock:
+            return self.countries.get(country, {}).get('open_until', 0) > (now or time.time())
+
+    def connect_timeout(self, country):
+        """Seconds to allow for a connect, based on the country's typical connect time."""
+        with self.lock:
+            latency = self.countries.get(country, {}).get('latency')
+        if latency is None:
+            return MAX_CONNECT_TIMEOUT
+        return max(MIN_CONNECT_TIMEOUT, min(MAX_CONNECT_TIMEOUT, latency * TIMEOUT_FACTOR))
+
+    def weight(self, country):
+        """Smoothed connect success rate, used to deprioritise unreliable countries."""
+        with self.lock:
+            entry = self.countries.get(country)
+            if not entry:
+                return 1.0
+            return (entry['attempts'] - entry['failures'] + 1) / (entry['attempts'] + 2)
+
+    def report(self, countries):
+        """Print the circuit state of countries that are open or have failed before."""
+        now = time.time()
+        for country in countries:
+            with self.lock:
+                entry = self.countries.get(country)
+            if not entry or not entry['failures']:
+                continue
+            state = "open" if entry['open_until'] > now else "closed"
+            latency = f"{entry['latency']:.1f}s" if entry['latency'] is not None else "-"
+            print(f"  {country:<28} {state:<6} {entry['attempts'] - entry['failures']}/{entry['attempts']} "
+                  f"connects ok, typical connect {latency}")
+
+    def save(self):
+        with self.lock:
+            save_json(self.path, self.countries)
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""VPN targets: a NordVPN country, or a country and city joined as Country__City."""
+
+
+# Joins country and city in a single connect target, e.g. Germany__Frankfurt
+CITY_SEPARATOR = "__"
+
+
+def split_target(target):
+    """Split a Country__City target into (country, city); city is None for a whole country."""
+    country, _, city = target.partition(CITY_SEPARATOR)
+    return country, city or None
+
+
+def city_target(country, city):
+    return f"{country}{CITY_SEPARATOR}{city}"